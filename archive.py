@@ -0,0 +1,210 @@
+# archive.py
+
+import gzip
+import json
+import lzma
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from persistence import atomic_write
+
+#####################
+## Define HistoryArchive class
+##### Cold storage for closed borrow history, one compressed file per month
+##### of borrowed_on ("2023-04.json.gz" or ".json.xz"). Partition files are
+##### never edited in place: adding rows to an archived month writes a new
+##### file and swaps it in. The index records each partition plus which
+##### months every member and book appears in, so a lookup decompresses
+##### only the partitions that can match, and the per-book / per-member
+##### borrow counts that keep the Library's reports whole.
+#####
+##### The index is copy-on-write too: every add() writes index.g<N>.json
+##### for a new generation N and leaves the previous one in place. The
+##### Library snapshot records the generation it was saved with
+##### (reference()) and reopens the archive at that generation, so rows
+##### archived by a run whose snapshot never got written are not counted
+##### twice; the run is simply repeated. prune() drops older generations
+##### once a snapshot refers to the new one.
+COMPRESSORS = {"gzip": (gzip, ".json.gz"), "lzma": (lzma, ".json.xz")}
+INDEX_PATTERN = re.compile(r"^index(?:\.g(\d+))?\.json$")  # index.json is generation 0
+CACHED_PARTITIONS = 4
+
+class HistoryArchive:
+    def __init__(self, path, compression="gzip", generation=None):
+        # generation: the index to open (as recorded by a snapshot); None
+        # opens the newest
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.path = path
+        self.compression = compression
+        self.generation = 0
+        self.base_generation = 0  # generation this one was built from
+        self.partitions = {}    # month -> {"file": name, "rows": n}
+        self.member_months = {} # member_id -> [month, ...]
+        self.book_months = {}   # book_id -> [month, ...]
+        self.book_counts = {}   # book_id -> archived borrows
+        self.member_counts = {} # member_id -> archived borrows
+        self._cache = OrderedDict()  # month -> rows, most recently used last
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._load_index(max(self._generations(), default=0) if generation is None else generation)
+
+    @staticmethod
+    def _index_name(generation):
+        return "index.json" if generation == 0 else f"index.g{generation}.json"
+
+    def _generations(self):
+        # Generations with an index file on disk
+        found = []
+        for name in os.listdir(self.path):
+            match = INDEX_PATTERN.match(name)
+            if match:
+                found.append(int(match.group(1) or 0))
+        return found
+
+    def _load_index(self, generation):
+        try:
+            with open(os.path.join(self.path, self._index_name(generation)), "r") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            if generation == 0:
+                return  # new, empty archive
+            raise ValueError(f"History archive {self.path} has no generation {generation}")
+        self.generation = generation
+        self.base_generation = index.get("base_generation", 0)
+        self.partitions = index["partitions"]
+        self.member_months = index["member_months"]
+        self.book_months = index["book_months"]
+        self.book_counts = index["book_counts"]
+        self.member_counts = index["member_counts"]
+
+    def __len__(self):
+        return sum(p["rows"] for p in self.partitions.values())
+
+    def months(self):
+        return sorted(self.partitions)
+
+    # --------------------------------------------
+    # Writing
+    # --------------------------------------------
+    def add(self, rows_by_month):
+        """Archive rows ({month: [(member_id, book_id, borrowed_on, returned_on), ...]}).
+        Rows already in the archive are skipped. The rows go into a new
+        generation; older partition files stay until prune()."""
+        with self._lock:
+            changed = False
+            for month, rows in sorted(rows_by_month.items()):
+                existing = self._read(month) if month in self.partitions else []
+                seen = set(existing)
+                new_rows = [row for row in map(tuple, rows) if row not in seen]
+                if not new_rows:
+                    continue
+                merged = sorted(existing + new_rows, key=lambda row: row[2])
+                module, suffix = COMPRESSORS[self.compression]
+                version = self.partitions.get(month, {}).get("version", 0) + 1
+                name = f"{month}.v{version}{suffix}"
+                atomic_write(os.path.join(self.path, name),
+                             module.compress(json.dumps(merged, separators=(",", ":")).encode()), mode="wb")
+                self.partitions[month] = {"file": name, "rows": len(merged), "version": version}
+                changed = True
+                self._cache.pop(month, None)
+                for member_id, book_id, _, _ in new_rows:
+                    self._add_month(self.member_months, member_id, month)
+                    self._add_month(self.book_months, book_id, month)
+                    self.member_counts[member_id] = self.member_counts.get(member_id, 0) + 1
+                    self.book_counts[book_id] = self.book_counts.get(book_id, 0) + 1
+            if changed:
+                # Past any generation left behind by an uncommitted run
+                self.base_generation = self.generation
+                self.generation = max(self._generations() + [self.generation]) + 1
+                self._write_index()
+
+    def reference(self):
+        # What a Library snapshot stores to reopen this archive as it is now
+        return {"path": self.path, "compression": self.compression, "generation": self.generation}
+
+    def prune(self):
+        # Remove index files and partitions that neither this generation nor
+        # its base refers to (readers of the previous snapshot may still
+        # open the base). Call once a snapshot refers to this generation.
+        with self._lock:
+            keep = {self.generation, self.base_generation}
+            files = {p["file"] for p in self.partitions.values()}
+            try:
+                with open(os.path.join(self.path, self._index_name(self.base_generation)), "r") as f:
+                    files.update(p["file"] for p in json.load(f)["partitions"].values())
+            except FileNotFoundError:
+                pass
+            for name in os.listdir(self.path):
+                match = INDEX_PATTERN.match(name)
+                if match:
+                    if int(match.group(1) or 0) not in keep:
+                        os.remove(os.path.join(self.path, name))
+                elif name.endswith(COMPRESSORS[self.compression][1]) and name not in files:
+                    os.remove(os.path.join(self.path, name))
+
+    @staticmethod
+    def _add_month(months_by_id, key, month):
+        months = months_by_id.setdefault(key, [])
+        if month not in months:
+            months.append(month)
+            months.sort()
+
+    def _write_index(self):
+        index = {"format": 1, "generation": self.generation, "base_generation": self.base_generation,
+                 "partitions": self.partitions,
+                 "member_months": self.member_months, "book_months": self.book_months,
+                 "book_counts": self.book_counts, "member_counts": self.member_counts}
+        atomic_write(os.path.join(self.path, self._index_name(self.generation)),
+                     json.dumps(index, separators=(",", ":")))
+
+    # --------------------------------------------
+    # Reading
+    # --------------------------------------------
+    def _read(self, month):
+        # Rows of one partition as tuples; keeps a few recent ones decompressed
+        rows = self._cache.get(month)
+        if rows is not None:
+            self._cache.move_to_end(month)
+            return rows
+        rows = read_partition(os.path.join(self.path, self.partitions[month]["file"]))
+        self._cache[month] = rows
+        if len(self._cache) > CACHED_PARTITIONS:
+            self._cache.popitem(last=False)
+        return rows
+
+    def partition_paths(self):
+        return [os.path.join(self.path, self.partitions[month]["file"]) for month in self.months()]
+
+    def rows_for_member(self, member_id, start=None, end=None):
+        return self._select(self.member_months.get(member_id, ()), start, end, 0, member_id)
+
+    def rows_for_book(self, book_id, start=None, end=None):
+        return self._select(self.book_months.get(book_id, ()), start, end, 1, book_id)
+
+    def rows_between(self, start=None, end=None):
+        return self._select(self.partitions, start, end)
+
+    def _select(self, months, start, end, column=None, key=None):
+        # Rows whose borrowed_on lies in [start, end] (ISO dates, either may
+        # be None), reading only partitions of months in that range
+        first, last = (start or "")[:7], (end or "9999-12")[:7]
+        result = []
+        with self._lock:
+            for month in sorted(m for m in months if first <= m <= last):
+                for row in self._read(month):
+                    if column is not None and row[column] != key:
+                        continue
+                    if (start and row[2] < start) or (end and row[2] > end):
+                        continue
+                    result.append(row)
+        return result
+
+
+def read_partition(path):
+    # Rows of one partition file as (member_id, book_id, borrowed_on, returned_on) tuples
+    module = gzip if path.endswith(".gz") else lzma
+    with open(path, "rb") as f:
+        return [tuple(row) for row in json.loads(module.decompress(f.read()))]
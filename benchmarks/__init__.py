@@ -0,0 +1,2 @@
+# Benchmarks for libraryClasses.Library. Each module is also a script; see
+# suite.py for the scaling suite and datagen.py for the synthetic data.
@@ -0,0 +1,41 @@
+# bench_lookup.py
+#
+# Shows that Library.find_book_by_id / find_member_by_id cost stays flat as
+# the catalog grows. Run from the repository root:
+#     python benchmarks/bench_lookup.py
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libraryClasses import Book, Member, Library
+
+SIZES = [1_000, 10_000, 100_000, 500_000]
+LOOKUPS = 100_000
+
+
+def build_library(n):
+    books = [Book(f"B{i:06d}", f"Title {i}", f"Author {i % 997}", f"Genre {i % 20}") for i in range(n)]
+    members = [Member(f"M{i:06d}", f"Member {i}", 30, "9000000000") for i in range(n // 10)]
+    return Library(books, members)
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'books':>10} | {'find_book ns/op':>16} | {'find_member ns/op':>18}")
+    print("-" * 52)
+    for n in SIZES:
+        library = build_library(n)
+        book_ids = [f"B{rng.randrange(n):06d}" for _ in range(LOOKUPS)]
+        member_ids = [f"M{rng.randrange(n // 10):06d}" for _ in range(LOOKUPS)]
+
+        t_book = timeit.timeit(lambda: [library.find_book_by_id(b) for b in book_ids], number=1)
+        t_member = timeit.timeit(lambda: [library.find_member_by_id(m) for m in member_ids], number=1)
+        print(f"{n:>10} | {t_book / LOOKUPS * 1e9:>16.1f} | {t_member / LOOKUPS * 1e9:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
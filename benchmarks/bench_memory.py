@@ -0,0 +1,99 @@
+# bench_memory.py
+#
+# Memory used by books, members and borrow history in the original layout
+# (plain classes, list of BorrowRecord with string dates, borrowed_books as
+# a list of dicts) versus the slotted classes and columnar BorrowHistory.
+# Run from the repository root:
+#     python benchmarks/bench_memory.py [history_rows]
+
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libraryClasses import Book, Member
+from history import BorrowHistory, from_ordinal
+
+
+# The original, dict-backed classes, reproduced for comparison
+class LegacyBook:
+    def __init__(self, book_id, title, author, genre, available=True):
+        self.book_id = book_id
+        self.title = title
+        self.author = author
+        self.genre = genre
+        self.available = available
+
+
+class LegacyMember:
+    def __init__(self, member_id, name, age, contact, borrowed_books=None):
+        self.member_id = member_id
+        self.name = name
+        self.age = age
+        self.contact = contact
+        self.borrowed_books = borrowed_books or []
+
+
+class LegacyBorrowRecord:
+    def __init__(self, member_id, book_id, borrowed_on, returned_on=None):
+        self.member_id = member_id
+        self.book_id = book_id
+        self.borrowed_on = borrowed_on
+        self.returned_on = returned_on
+
+
+def make_rows(n_books, n_members, n_history, seed=1):
+    rng = random.Random(seed)
+    books = [(f"B{i:06d}", f"Title {i}", f"Author {i % 5000}", f"Genre {i % 30}") for i in range(n_books)]
+    members = [(f"M{i:05d}", f"Member {i}", 20 + i % 60, f"9{i:09d}") for i in range(n_members)]
+    history = []
+    for _ in range(n_history):
+        day = rng.randrange(738000, 739500)
+        history.append((f"M{rng.randrange(n_members):05d}", f"B{rng.randrange(n_books):06d}", day, day + 14))
+    return books, members, history
+
+
+def measure(build):
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def main():
+    n_history = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_books, n_members = 100_000, 20_000
+    books, members, history = make_rows(n_books, n_members, n_history)
+    # Strings are shared with the input in both layouts, so the original
+    # layout is measured optimistically (a JSON load allocates them per row)
+    history_str = [(m, b, from_ordinal(d1), from_ordinal(d2)) for m, b, d1, d2 in history]
+
+    cases = [
+        ("books (100k)",
+         lambda: [LegacyBook(*b) for b in books],
+         lambda: [Book(*b) for b in books]),
+        ("members (20k, 3 loans)",
+         lambda: [LegacyMember(*m, [{"book_id": "B000001", "borrowed_on": "2026-01-01"} for _ in range(3)])
+                  for m in members],
+         lambda: [Member(*m, [{"book_id": f"B00000{i}", "borrowed_on": "2026-01-01"} for i in range(3)])
+                  for m in members]),
+        (f"history ({n_history})",
+         lambda: [LegacyBorrowRecord(*r) for r in history_str],
+         lambda: BorrowHistory.from_dicts(
+             {"member_id": m, "book_id": b, "borrowed_on": d1, "returned_on": d2} for m, b, d1, d2 in history_str)),
+    ]
+
+    print(f"{'data':>24} | {'original MB':>11} | {'compact MB':>10} | {'ratio':>5}")
+    print("-" * 62)
+    for label, legacy, compact in cases:
+        before = measure(legacy)
+        after = measure(compact)
+        print(f"{label:>24} | {before / 2**20:>11.1f} | {after / 2**20:>10.1f} | {before / after:>5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# bench_replicas.py
+#
+# Read throughput of the catalog-search / report mix served by ReplicaPool
+# (replicas.py) at several worker counts, against the same queries run
+# serially in the writer process. Run from the repository root:
+#     python benchmarks/bench_replicas.py [n_books] [workers,...]
+#
+# Defaults: 100k books and 1, 2, 4, ... up to the CPU count. Queries run
+# through server.py's operation handlers and are JSON-encoded, as
+# LibraryServer does, so both sides do the same work; each is submitted
+# separately, INFLIGHT at a time per worker, and pool numbers include
+# sending the encoded results back. Scaling is bounded by the core count: on a single-core
+# machine the pool can only lose to serial.
+
+import os
+import random
+import sys
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import generate
+from replicas import ReplicaPool
+from server import OPERATIONS, encoded_result
+
+N_QUERIES = 1_000
+INFLIGHT = 4
+N_GENRES = 50
+
+
+def query_mix(library, rng, n):
+    # (operation, args): title/author substring searches, genre shelves and
+    # the two heavy reports, in a fixed random order
+    titles = [rng.choice(library.books).title.split()[0][:5] for _ in range(50)]
+    authors = [rng.choice(library.books).author.split()[1] for _ in range(50)]
+    genres = [f"Genre {g:03d}" for g in range(N_GENRES)]
+    mix = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.4:
+            mix.append(("search_books", (rng.choice(titles),)))
+        elif roll < 0.6:
+            mix.append(("search_books", (None, rng.choice(authors))))
+        elif roll < 0.85:
+            mix.append(("get_available_books_by_genre", (rng.choice(genres),)))
+        elif roll < 0.95:
+            mix.append(("most_popular_genre", ()))
+        else:
+            mix.append(("list_members_with_borrows", ()))
+    return mix
+
+
+def run_serial(library, mix):
+    start = time.perf_counter()
+    for op, args in mix:
+        encoded_result(library, OPERATIONS[op][0], *args)
+    return time.perf_counter() - start
+
+
+def run_pool(pool, mix):
+    # Keep INFLIGHT queries per worker outstanding until the mix is done
+    pending = set()
+    queries = iter(mix)
+    start = time.perf_counter()
+    for op, args in queries:
+        pending.add(pool.submit_call(encoded_result, OPERATIONS[op][0], *args))
+        if len(pending) >= pool.workers * INFLIGHT:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+    for future in pending:
+        future.result()
+    return time.perf_counter() - start
+
+
+def main():
+    n_books = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    cpus = os.cpu_count() or 1
+    if len(sys.argv) > 2:
+        counts = [int(w) for w in sys.argv[2].split(",")]
+    else:
+        counts = [1]
+        while counts[-1] * 2 <= cpus:
+            counts.append(counts[-1] * 2)
+
+    library = generate(n_books=n_books, n_genres=N_GENRES, seed=42)
+    mix = query_mix(library, random.Random(7), N_QUERIES)
+    print(f"{n_books:,} books, {len(mix):,} queries, {cpus} CPUs")
+
+    serial = run_serial(library, mix)
+    print(f"{'workers':>8} | {'queries/s':>10} | {'vs serial':>9} | {'startup s':>9}")
+    print(f"{'serial':>8} | {len(mix) / serial:>10.0f} | {1.0:>8.2f}x | {'-':>9}")
+    for workers in counts:
+        start = time.perf_counter()
+        pool = ReplicaPool(library, workers)
+        # Warm every worker (spawn + snapshot load) before timing
+        list(pool.executor.map(abs, range(workers * 4)))
+        pool.query("most_popular_genre")
+        startup = time.perf_counter() - start
+        try:
+            seconds = run_pool(pool, mix)
+        finally:
+            pool.close()
+        print(f"{workers:>8} | {len(mix) / seconds:>10.0f} | {serial / seconds:>8.2f}x | {startup:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench_reports.py
+#
+# Full-history ReportEngine.summary() (reports.py) on large borrow
+# histories: pure-Python and NumPy counting, inline and in a process pool,
+# against a plain per-row loop over the history. Run from the repository
+# root:
+#     python benchmarks/bench_reports.py [rows] [workers]
+#
+# Defaults: 10 million rows and every CPU. The history is a datagen.py
+# history (100k books, 1M rows) repeated to the requested size, which keeps
+# generation quick; the per-row loop is timed on the first million rows
+# and scaled up.
+
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import generate
+import reports
+from history import BorrowHistory
+from reports import ReportEngine
+
+BASE_BOOKS = 100_000
+BASE_ROWS = 1_000_000
+LOOP_ROWS = 1_000_000
+
+
+def build_library(rows):
+    library = generate(n_books=BASE_BOOKS, n_genres=50, n_history=BASE_ROWS, seed=42)
+    base = library.borrow_history
+    repeat = -(-rows // BASE_ROWS)
+    library.borrow_history = BorrowHistory.from_columns(
+        base.member_table, base.book_table,
+        (base.member_codes * repeat)[:rows], (base.book_codes * repeat)[:rows],
+        (base.borrowed_days * repeat)[:rows], (base.returned_days * repeat)[:rows])
+    return library
+
+
+def row_loop(library, rows):
+    # The straightforward report: one Python iteration per history record
+    genres, months = Counter(), Counter()
+    books = library._books_by_id
+    history = library.borrow_history
+    for record in history[:rows]:
+        months[record.borrowed_on[:7]] += 1
+        genres[books[record.book_id].genre] += 1
+    return genres, months
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+
+    start = time.perf_counter()
+    library = build_library(rows)
+    print(f"{rows:,} history rows built in {time.perf_counter() - start:.1f}s; "
+          f"{workers} workers; NumPy {'available' if reports.np is not None else 'not installed'}")
+
+    sample = min(rows, LOOP_ROWS)
+    start = time.perf_counter()
+    row_loop(library, sample)
+    loop_seconds = (time.perf_counter() - start) * rows / sample
+    print(f"{'method':<26} | {'seconds':>8} | {'rows/s':>12}")
+    print(f"{'per-row loop (scaled)':<26} | {loop_seconds:>8.2f} | {rows / loop_seconds:>12,.0f}")
+
+    configs = [("python, inline", False, 1), ("python, pool", False, workers)]
+    if reports.np is not None:
+        configs += [("numpy, inline", True, 1), ("numpy, pool", True, workers)]
+    expected = None
+    for name, use_numpy, n in configs:
+        engine = ReportEngine(library, workers=n, use_numpy=use_numpy)
+        start = time.perf_counter()
+        result = engine.summary(as_of="2024-09-01")
+        seconds = time.perf_counter() - start
+        if expected is None:
+            expected = result
+        elif result != expected:
+            print(f"  {name}: results differ from {configs[0][0]}")
+        print(f"{name:<26} | {seconds:>8.2f} | {rows / seconds:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# bench_search.py
+#
+# Latency of Library.search_books (substring compatibility mode) and
+# Library.search (ranked) against the original linear scan. Run from the
+# repository root:
+#     python benchmarks/bench_search.py [n_books ...]
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libraryClasses import Book, Library
+
+# Pseudo-words from syllables give a few thousand distinct title/author words
+SYLLABLES = "ka lo mi ra ve shu dan tor el is an gri po ne ul".split()
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+SURNAMES = [a + b for a in SYLLABLES for b in SYLLABLES]
+QUERIES = [("kalomi", None), ("shudan", None), ("kalomi ra", None), (None, "torel"), ("miveis", "grine")]
+RANKED = ["kalomi ravetor", "shuda", "miveis grine"]
+
+
+def build_library(n, rng):
+    books = []
+    for i in range(n):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))).title() + f" {i}"
+        author = f"{rng.choice(SURNAMES).title()} {rng.choice(SURNAMES).title()}"
+        books.append(Book(f"B{i:07d}", title, author, "Fiction"))
+    return Library(books)
+
+
+def linear_search(library, title, author):
+    results = library.books
+    if title:
+        results = [b for b in results if title.lower() in b.title.lower()]
+    if author:
+        results = [b for b in results if author.lower() in b.author.lower()]
+    return results
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or [10_000, 100_000]
+    rng = random.Random(7)
+    for n in sizes:
+        start = time.perf_counter()
+        library = build_library(n, rng)
+        print(f"\n{n} books (build + index {time.perf_counter() - start:.1f}s)")
+        print(f"{'query':>22} | {'hits':>7} | {'indexed ms':>10} | {'scan ms':>8}")
+        for title, author in QUERIES:
+            t_index, hits = timed(lambda: library.search_books(title, author))
+            t_scan, expected = timed(lambda: linear_search(library, title, author), repeat=1)
+            assert hits == expected, (title, author)
+            label = f"{title or ''}/{author or ''}"
+            print(f"{label:>22} | {len(hits):>7} | {t_index:>10.3f} | {t_scan:>8.1f}")
+        for query in RANKED:
+            t_index, hits = timed(lambda: library.search(query, limit=20))
+            print(f"{'ranked: ' + query:>22} | {len(hits):>7} | {t_index:>10.3f} |")
+
+
+if __name__ == "__main__":
+    main()
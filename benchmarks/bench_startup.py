@@ -0,0 +1,72 @@
+# bench_startup.py
+#
+# Startup cost of the JSON file versus the binary snapshot: file size, full
+# load time, and the time to open a memory-mapped snapshot and resolve one
+# book_id. Run from the repository root:
+#     python benchmarks/bench_startup.py [n_books] [n_history]
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libraryClasses import Book, Member, Library
+from history import BorrowHistory, from_ordinal
+from snapshot import SnapshotReader
+
+
+def build_library(n_books, n_history, seed=3):
+    rng = random.Random(seed)
+    books = [Book(f"B{i:06d}", f"Title {i}", f"Author {i % 5000}", f"Genre {i % 30}") for i in range(n_books)]
+    n_members = max(1, n_books // 10)
+    members = [Member(f"M{i:05d}", f"Member {i}", 20 + i % 60, f"9{i:09d}") for i in range(n_members)]
+    history = BorrowHistory()
+    for _ in range(n_history):
+        day = rng.randrange(738000, 739500)
+        history.add(f"M{rng.randrange(n_members):05d}", f"B{rng.randrange(n_books):06d}",
+                    from_ordinal(day), from_ordinal(day + 14))
+    return Library(books, members, history)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    n_books = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_history = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    library = build_library(n_books, n_history)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "library_data.json")
+        snap_path = os.path.join(tmp, "library.snap")
+        library.datafile = json_path
+        t_save_json, _ = timed(library.save_to_json)
+        t_save_snap, _ = timed(lambda: library.save_to_snapshot(snap_path))
+
+        t_json, _ = timed(lambda: Library.load_from_json(json_path))
+        t_stream, _ = timed(lambda: Library.load_streaming(json_path, lazy_history=True))
+        t_snap, _ = timed(lambda: Library.load_from_snapshot(snap_path))
+
+        def open_and_find():
+            with SnapshotReader(snap_path) as reader:
+                return reader.find_book(f"B{n_books // 2:06d}")
+        t_mmap, _ = timed(open_and_find)
+
+        print(f"{n_books} books, {n_history} history rows")
+        print(f"{'':>28} | {'JSON':>10} | {'snapshot':>10}")
+        print(f"{'file size (MB)':>28} | {os.path.getsize(json_path) / 2**20:>10.1f} | "
+              f"{os.path.getsize(snap_path) / 2**20:>10.1f}")
+        print(f"{'save (s)':>28} | {t_save_json:>10.2f} | {t_save_snap:>10.2f}")
+        print(f"{'full load (s)':>28} | {t_json:>10.2f} | {t_snap:>10.2f}")
+        print(f"{'streaming, lazy history (s)':>28} | {t_stream:>10.2f} |")
+        print(f"{'mmap open + find_book (ms)':>28} | {'':>10} | {t_mmap * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# datagen.py
+#
+# Deterministic synthetic library data for benchmarks: the same arguments
+# and seed always give the same books, members and borrow history.
+#
+# Popularity is skewed the way real circulation is: genre sizes, author
+# output, book demand and member activity all follow Zipf-like weights,
+# so a few genres, authors, titles and readers account for most loans.
+# History rows are in date order; loans in the last OPEN_WINDOW days may
+# still be open (book unavailable, member holding it).
+
+import os
+import random
+import sys
+from array import array
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libraryClasses import Book, Member, Library
+from history import BorrowHistory, InternTable, from_ordinal
+
+WORDS = (
+    "shadow river silent garden broken crown hidden empire lost city night star winter "
+    "summer iron glass golden secret last first dark light ocean mountain storm fire "
+    "paper ghost machine kingdom forest desert island bridge tower letter journey song "
+    "dream memory stone wolf raven rose blood silver winds house road door mirror clock"
+).split()
+FIRST_NAMES = "Asha Ben Chen Dara Elif Farah Gita Hugo Ines Jon Kofi Lena Mira Nils Omar Priya Ravi Sara Tomas Uma".split()
+LAST_NAMES = "Rao Smith Ito Novak Silva Khan Berg Okafor Costa Meyer Singh Dubois Park Ahmed Lopez Moreau".split()
+START_DAY = 738000   # 2021-07-31 as a date ordinal
+SPAN_DAYS = 1095     # history covers three years
+OPEN_WINDOW = 30
+ZIPF_S = 1.1
+
+
+def zipf_cum_weights(n, s=ZIPF_S):
+    return list(accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def book_id(i):
+    return f"B{i:07d}"
+
+
+def member_id(i):
+    return f"M{i:06d}"
+
+
+def generate(n_books=1000, n_genres=20, n_members=None, n_history=None, seed=42):
+    """Build a Library with n_books books over n_genres genres, n_members
+    members (default n_books // 10) and n_history history rows (default
+    2 * n_books)."""
+    rng = random.Random(seed)
+    n_members = max(1, n_books // 10) if n_members is None else n_members
+    n_history = 2 * n_books if n_history is None else n_history
+
+    genres = [f"Genre {g:03d}" for g in range(n_genres)]
+    n_authors = max(1, n_books // 20)
+    authors = [f"{FIRST_NAMES[a % len(FIRST_NAMES)]} {LAST_NAMES[a // len(FIRST_NAMES) % len(LAST_NAMES)]} {a}"
+               for a in range(n_authors)]
+    genre_of = rng.choices(range(n_genres), cum_weights=zipf_cum_weights(n_genres), k=n_books)
+    author_of = rng.choices(range(n_authors), cum_weights=zipf_cum_weights(n_authors), k=n_books)
+    books = [
+        Book(book_id(i), f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}",
+             authors[author_of[i]], genres[genre_of[i]])
+        for i in range(n_books)
+    ]
+    members = [
+        Member(member_id(i), f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[i % len(LAST_NAMES)]}",
+               18 + i % 60, f"9{i % 10 ** 9:09d}")
+        for i in range(n_members)
+    ]
+
+    # Demand rank is a shuffled permutation so popular books are spread
+    # over the catalog rather than being the lowest IDs
+    book_rank = list(range(n_books))
+    rng.shuffle(book_rank)
+    member_rank = list(range(n_members))
+    rng.shuffle(member_rank)
+    book_picks = rng.choices(book_rank, cum_weights=zipf_cum_weights(n_books), k=n_history)
+    member_picks = rng.choices(member_rank, cum_weights=zipf_cum_weights(n_members), k=n_history)
+    days = sorted(rng.randrange(SPAN_DAYS) for _ in range(n_history))
+
+    borrowed_days = array("i")
+    returned_days = array("i")
+    open_books = set()
+    for row in range(n_history):
+        day = START_DAY + days[row]
+        borrowed_days.append(day)
+        b = book_picks[row]
+        if days[row] >= SPAN_DAYS - OPEN_WINDOW and b not in open_books and rng.random() < 0.5:
+            open_books.add(b)
+            returned_days.append(0)
+            books[b].available = False
+            members[member_picks[row]].add_borrowed_book(book_id(b), from_ordinal(day))
+        else:
+            returned_days.append(day + 1 + rng.randrange(28))
+
+    history = BorrowHistory.from_columns(
+        InternTable.from_ids([member_id(i) for i in range(n_members)]),
+        InternTable.from_ids([book_id(i) for i in range(n_books)]),
+        array("I", member_picks), array("I", book_picks), borrowed_days, returned_days)
+    return Library(books, members, history)
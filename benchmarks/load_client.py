@@ -0,0 +1,121 @@
+# load_client.py
+#
+# Async load generator for server.py: opens many concurrent client
+# connections, each running a mixed stream of lookups, searches, checkouts
+# and returns, and reports throughput and latency percentiles per operation.
+# Run from the repository root, either against a running server
+#     python benchmarks/load_client.py [clients] [requests_per_client] --port 8765
+# or, without --port, against an in-process server on a synthetic library
+# (journal + fsync in a temp dir; --no-fsync to leave fsync out):
+#     python benchmarks/load_client.py [clients] [requests_per_client]
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libraryClasses import Book, Member, Library
+from server import LibraryClient, LibraryServer
+
+N_BOOKS = 20_000
+N_MEMBERS = 2_000
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def build_library(datafile):
+    library = Library(
+        [Book(f"B{i:05d}", f"Title {i}", f"Author {i % 500}", f"Genre {i % 20}") for i in range(N_BOOKS)],
+        [Member(f"M{i:04d}", f"Member {i}", 30, "9000000000") for i in range(N_MEMBERS)],
+        datafile=datafile)
+    library.save_to_json()
+    library.enable_journal(compact_every=None, fsync="--no-fsync" not in sys.argv)
+    return library
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def client_session(port, index, n_requests, latencies, failures):
+    rng = random.Random(index)
+    client = await LibraryClient.connect(port=port)
+    mine = []
+    try:
+        for _ in range(n_requests):
+            roll = rng.random()
+            if mine and roll < 0.25:
+                op, args = "return_book", dict(zip(("member_id", "book_id"), mine.pop()))
+            elif roll < 0.5:
+                op, args = "borrow_book", {"member_id": f"M{rng.randrange(N_MEMBERS):04d}",
+                                           "book_id": f"B{rng.randrange(N_BOOKS):05d}"}
+            elif roll < 0.8:
+                op, args = "find_book", {"book_id": f"B{rng.randrange(N_BOOKS):05d}"}
+            elif roll < 0.95:
+                op, args = "search", {"query": str(rng.randrange(N_BOOKS)), "limit": 10}
+            else:
+                op, args = "top_genres", {"n": 5}
+
+            start = time.perf_counter()
+            reply = await client.call(op, **args)
+            latencies.setdefault(op, []).append(time.perf_counter() - start)
+            if reply["ok"]:
+                if op == "borrow_book":
+                    mine.append((args["member_id"], args["book_id"]))
+            elif op != "borrow_book":  # a taken copy is an expected refusal
+                failures.append((op, reply["error"]))
+    finally:
+        await client.close()
+
+
+async def run(clients, n_requests, port=None):
+    server = tmp = None
+    if port is None:
+        tmp = tempfile.TemporaryDirectory()
+        library = build_library(os.path.join(tmp.name, "library_data.json"))
+        server = await LibraryServer(library, port=0).start()
+        port = server.port
+
+    latencies, failures = {}, []
+    start = time.perf_counter()
+    sessions = [client_session(port, i, n_requests, latencies, failures) for i in range(clients)]
+    await asyncio.gather(*sessions)
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        await server.close(save=False)
+        server.library.journal.close()
+        tmp.cleanup()
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{clients} clients x {n_requests} requests: {total} in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} req/s), {len(failures)} unexpected errors")
+    header = "".join(f"{'p' + str(p):>9}" for p in PERCENTILES)
+    print(f"{'operation':<18}{'count':>8}{header}   (ms)")
+    for op in sorted(latencies):
+        values = sorted(latencies[op])
+        cells = "".join(f"{percentile(values, p) * 1000:>9.2f}" for p in PERCENTILES)
+        print(f"{op:<18}{len(values):>8}{cells}")
+    for op, error in failures[:5]:
+        print(f"  {op}: {error}")
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    port = None
+    if "--port" in sys.argv:
+        port = int(sys.argv[sys.argv.index("--port") + 1])
+        args.remove(str(port))
+    clients = int(args[0]) if args else 1000
+    n_requests = int(args[1]) if len(args) > 1 else 20
+    asyncio.run(run(clients, n_requests, port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# stress_threads.py
+#
+# Multi-threaded stress test for Library: checks that concurrent desks never
+# issue the same copy twice and that every index stays consistent, then
+# reports checkout/return throughput as the thread count grows. Run from the
+# repository root:
+#     python benchmarks/stress_threads.py [--journal]
+#
+# With --journal every operation is fsync'd to a journal in a temp dir, so
+# the I/O wait (which releases the GIL) shows up in the numbers.
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libraryClasses import Book, Member, Library
+from storage import SqliteStorage
+
+THREAD_COUNTS = [1, 2, 4, 8, 16]
+N_BOOKS = 5_000
+N_MEMBERS = 500
+OPS_PER_THREAD = 4_000
+
+
+def build_library(datafile=None, journal=False):
+    library = Library(
+        [Book(f"B{i:05d}", f"Title {i}", f"Author {i % 300}", f"Genre {i % 12}") for i in range(N_BOOKS)],
+        [Member(f"M{i:04d}", f"Member {i}", 30, "9000000000") for i in range(N_MEMBERS)],
+        datafile=datafile)
+    if journal:
+        library.enable_journal(compact_every=None)
+    return library
+
+
+def race_same_copy(rounds=200, threads=8):
+    # All threads hit the same available book at once; exactly one may win
+    library = build_library()
+    for r in range(rounds):
+        book_id = f"B{r:05d}"
+        barrier = threading.Barrier(threads)
+        wins = []
+
+        def desk(member_id):
+            barrier.wait()
+            try:
+                library.borrow_book(member_id, book_id)
+                wins.append(member_id)
+            except ValueError:
+                pass
+
+        workers = [threading.Thread(target=desk, args=(f"M{t:04d}",)) for t in range(threads)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        assert len(wins) == 1, f"{book_id} issued {len(wins)} times"
+    check_consistency(library)
+    print(f"race: {rounds} rounds x {threads} threads on one copy -> no double borrows")
+
+
+def batch_after_replay():
+    # A batch that starts with the journal already past compact_every must
+    # not compact mid-batch: the snapshot would hold the batch while its
+    # journal records replay on top of it at the next load
+    with tempfile.TemporaryDirectory() as tmp:
+        datafile = os.path.join(tmp, "lib.json")
+        library = build_library(datafile)
+        library.save_to_json()
+        library.enable_journal(compact_every=None)
+        for i in range(6):
+            library.borrow_book(f"M{i:04d}", f"B{i:05d}")
+        library.close()
+
+        library = Library.load_from_json(datafile, journal=True)
+        library.compact_every = 3
+        results = library.borrow_many([("M0010", "B00010"), ("M0011", "B00011")])
+        assert all(r["ok"] for r in results), results
+        library.close()
+        reloaded = Library.load_from_json(datafile, journal=True)
+        assert sum(not b.available for b in reloaded.books) == 8, "batch lost or replayed twice"
+        check_consistency(reloaded)
+        reloaded.close()
+    print("journal: batch after replay compacts only once it is logged")
+
+
+def sqlite_lazy_history():
+    # open -> borrow -> return -> reopen on a write-through backend whose
+    # history loads lazily: the first write must not see its own row twice
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "library.db")
+        library = build_library()
+        library.storage = SqliteStorage(path)
+        library.save()
+        library.storage.close()
+
+        library = Library.open(SqliteStorage(path))
+        library.borrow_book("M0001", "B00100")
+        assert len(library.borrow_history) == 1 and library.borrow_count("B00100") == 1, "borrow recorded twice"
+        library.return_book("M0001", "B00100")
+        check_consistency(library)
+        library.save()
+        library.storage.close()
+
+        library = Library.open(SqliteStorage(path))
+        assert library.find_book_by_id("B00100").available, "returned book still out"
+        assert not library.find_member_by_id("M0001").has_borrowed("B00100"), "member still holds the book"
+        check_consistency(library)
+        library.storage.close()
+    print("sqlite: lazy history records each loan once")
+
+
+def run_mixed(library, threads, seed=0):
+    counts = {"borrow": 0, "return": 0}
+    counts_lock = threading.Lock()
+
+    def desk(index):
+        rng = random.Random(seed * 1000 + index)
+        mine = []
+        borrowed = returned = 0
+        for _ in range(OPS_PER_THREAD):
+            if mine and rng.random() < 0.5:
+                member_id, book_id = mine.pop(rng.randrange(len(mine)))
+                library.return_book(member_id, book_id)
+                returned += 1
+            else:
+                member_id = f"M{rng.randrange(N_MEMBERS):04d}"
+                book_id = f"B{rng.randrange(N_BOOKS):05d}"
+                try:
+                    library.borrow_book(member_id, book_id)
+                except ValueError:
+                    continue  # someone else has it
+                mine.append((member_id, book_id))
+                borrowed += 1
+        with counts_lock:
+            counts["borrow"] += borrowed
+            counts["return"] += returned
+
+    workers = [threading.Thread(target=desk, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return counts, elapsed
+
+
+def check_consistency(library, counts=None):
+    open_by_book = {}
+    closed = 0
+    for record in library.borrow_history:
+        if record.returned_on is None:
+            open_by_book[record.book_id] = open_by_book.get(record.book_id, 0) + 1
+        else:
+            closed += 1
+    for book in library.books:
+        n_open = open_by_book.get(book.book_id, 0)
+        assert n_open <= 1, f"{book.book_id} has {n_open} open loans"
+        assert book.available == (n_open == 0), f"{book.book_id} availability disagrees with history"
+    held = sum(m.borrowed_count() for m in library.members)
+    assert held == sum(open_by_book.values()), "member loans disagree with history"
+    assert sum(v["issued"] for v in library.genre_availability().values()) == held, "genre counts drifted"
+    if counts is not None:
+        assert counts["borrow"] == len(library.borrow_history), "lost or duplicated history rows"
+        assert counts["return"] == closed, "lost returns"
+
+
+def main():
+    use_journal = "--journal" in sys.argv
+    race_same_copy()
+    batch_after_replay()
+    sqlite_lazy_history()
+
+    print(f"\nmixed borrow/return, {OPS_PER_THREAD} ops per thread{' (journal + fsync)' if use_journal else ''}")
+    print(f"{'threads':>7} | {'ops':>7} | {'seconds':>7} | {'ops/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for threads in THREAD_COUNTS:
+            library = build_library(os.path.join(tmp, f"lib{threads}.json"), journal=use_journal)
+            counts, elapsed = run_mixed(library, threads, seed=threads)
+            check_consistency(library, counts)
+            ops = counts["borrow"] + counts["return"]
+            print(f"{threads:>7} | {ops:>7} | {elapsed:>7.2f} | {ops / elapsed:>9.0f}")
+            if library.journal is not None:
+                library.journal.close()
+    print("\nall consistency checks passed")
+
+
+if __name__ == "__main__":
+    main()
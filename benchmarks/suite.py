@@ -0,0 +1,201 @@
+# suite.py
+#
+# Library microbenchmarks at several catalog sizes on datagen.py data.
+# Run from the repository root:
+#     python benchmarks/suite.py [--scales 1k,10k,100k,1m] [--only name,...]
+#                                [--out results.json] [--compare baseline.json [--threshold 1.25]]
+#
+# Each scale N means N books over 50 genres, N/10 members and 2N history
+# rows. Every benchmark reports the best of ROUNDS timed rounds as
+# microseconds per operation. --out writes the results as JSON (with the
+# git commit, Python version and platform) so two commits can be compared
+# with --compare, which flags benchmarks more than THRESHOLD (or
+# --threshold) times slower and exits non-zero if any are.
+
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import book_id, generate, member_id
+from libraryClasses import Library
+
+DEFAULT_SCALES = "1k,10k,100k"
+N_GENRES = 50
+ROUNDS = 5
+THRESHOLD = 1.25
+
+
+def parse_scale(text):
+    text = text.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * factor)
+
+
+def best_of(fn, rounds=ROUNDS):
+    # Seconds taken by the fastest of rounds calls to fn()
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+#####################
+## Benchmarks
+##### Each takes (library, rng, tmp_dir) and returns (ops, seconds), where
+##### ops operations took seconds in the best round.
+def bench_find_book_by_id(library, rng, tmp):
+    ids = [book_id(rng.randrange(len(library.books))) for _ in range(10_000)]
+    find = library.find_book_by_id
+    return len(ids), best_of(lambda: [find(i) for i in ids])
+
+
+def uncached(bench):
+    # Run bench with the query result cache off, so every call does the work
+    def run(library, rng, tmp):
+        cache, library.query_cache = library.query_cache, None
+        try:
+            return bench(library, rng, tmp)
+        finally:
+            library.query_cache = cache
+    return run
+
+
+def bench_search_books(library, rng, tmp):
+    # Substring queries on title words and on author surnames
+    queries = [rng.choice(library.books).title.split()[0][:4] for _ in range(10)]
+    authors = [rng.choice(library.books).author.split()[1] for _ in range(10)]
+    def run():
+        for q in queries:
+            library.search_books(title=q)
+        for a in authors:
+            library.search_books(author=a)
+    return len(queries) + len(authors), best_of(run)
+
+
+def bench_available_by_genre(library, rng, tmp):
+    genres = [f"Genre {g:03d}" for g in range(N_GENRES)]
+    return len(genres), best_of(lambda: [library.get_available_books_by_genre(g) for g in genres])
+
+
+def bench_borrow_return(library, rng, tmp):
+    # One op = one checkout plus its return, on books that are on the shelf
+    available = [b.book_id for b in library.books if b.available]
+    books = rng.sample(available, min(2_000, len(available)))
+    loans = [(member_id(rng.randrange(len(library.members))), b) for b in books]
+    def run():
+        for member, book in loans:
+            library.borrow_book(member, book, borrowed_on="2024-09-01")
+        for member, book in loans:
+            library.return_book(member, book, returned_on="2024-09-02")
+    return len(loans), best_of(run)
+
+
+def bench_most_popular_genre(library, rng, tmp):
+    return 100, best_of(lambda: [library.most_popular_genre() for _ in range(100)])
+
+
+def bench_save_to_json(library, rng, tmp):
+    library.datafile = os.path.join(tmp, "library_data.json")
+    return 1, best_of(library.save_to_json, rounds=3)
+
+
+def bench_load_from_json(library, rng, tmp):
+    path = os.path.join(tmp, "library_data.json")
+    if not os.path.exists(path):
+        library.datafile = path
+        library.save_to_json()
+    return 1, best_of(lambda: Library.load_from_json(path), rounds=3)
+
+
+BENCHMARKS = [
+    ("find_book_by_id", bench_find_book_by_id),
+    ("search_books", uncached(bench_search_books)),
+    ("search_books_cached", bench_search_books),
+    ("get_available_books_by_genre", uncached(bench_available_by_genre)),
+    ("get_available_books_by_genre_cached", bench_available_by_genre),
+    ("borrow_return", bench_borrow_return),
+    ("most_popular_genre", bench_most_popular_genre),
+    ("save_to_json", bench_save_to_json),
+    ("load_from_json", bench_load_from_json),
+]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(scales, only=None):
+    results = []
+    for n in scales:
+        start = time.perf_counter()
+        library = generate(n_books=n, n_genres=N_GENRES, seed=42)
+        print(f"\nscale {n:,} books ({len(library.members):,} members, "
+              f"{len(library.borrow_history):,} history rows) generated in {time.perf_counter() - start:.1f}s")
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, bench in BENCHMARKS:
+                if only and name not in only:
+                    continue
+                ops, seconds = bench(library, random.Random(7), tmp)
+                per_op_us = seconds / ops * 1e6
+                results.append({"bench": name, "scale": n, "ops": ops, "seconds": seconds, "per_op_us": per_op_us})
+                print(f"  {name:<38}{per_op_us:>14.2f} us/op")
+    return results
+
+
+def compare(results, baseline_path, threshold=THRESHOLD):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {(r["bench"], r["scale"]): r["per_op_us"] for r in baseline["results"]}
+    print(f"\ncompared with {baseline_path} (commit {baseline['meta'].get('commit')})")
+    print(f"{'benchmark':<38}{'scale':>10}{'before us':>12}{'after us':>12}{'ratio':>8}")
+    regressions = 0
+    for r in results:
+        old = before.get((r["bench"], r["scale"]))
+        if old is None:
+            continue
+        ratio = r["per_op_us"] / old if old else float("inf")
+        flag = "  SLOWER" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"{r['bench']:<38}{r['scale']:>10}{old:>12.2f}{r['per_op_us']:>12.2f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def option(name, default=None):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def main():
+    scales = [parse_scale(s) for s in option("--scales", DEFAULT_SCALES).split(",")]
+    only = option("--only")
+    results = run_suite(scales, only.split(",") if only else None)
+
+    out = option("--out")
+    if out:
+        meta = {"commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "rounds": ROUNDS}
+        with open(out, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"\nwrote {out}")
+
+    baseline = option("--compare")
+    if baseline and compare(results, baseline, float(option("--threshold", THRESHOLD))):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# borrowstats.py
+
+from collections import Counter
+
+#####################
+## Define RankedCounter class
+##### Counter for keys that only ever go up by one, kept ranked at all times.
+##### Keys live in buckets of equal count; buckets form a doubly linked list
+##### from the highest count (head) to the lowest (tail). An increment moves
+##### a key to the neighbouring bucket, so it is O(1), and top(k) walks the
+##### list from the head in O(k).
+class _Bucket:
+    __slots__ = ("count", "keys", "higher", "lower")
+
+    def __init__(self, count):
+        self.count = count
+        self.keys = {}  # insertion ordered: order in which keys reached count
+        self.higher = None
+        self.lower = None
+
+
+class RankedCounter:
+    def __init__(self):
+        self._bucket_of = {}
+        self._first_seen = {}
+        self._head = None
+        self._tail = None
+
+    @staticmethod
+    def from_counts(counts):
+        # Bulk build from {key: count} in first-seen order (e.g. a Counter)
+        counter = RankedCounter()
+        counter._first_seen = {key: i for i, key in enumerate(counts)}
+        by_count = {}
+        for key, count in counts.items():
+            by_count.setdefault(count, []).append(key)
+        lower = None
+        for count in sorted(by_count):
+            bucket = _Bucket(count)
+            bucket.keys = dict.fromkeys(by_count[count])
+            counter._link(bucket, higher=None, lower=lower)
+            for key in bucket.keys:
+                counter._bucket_of[key] = bucket
+            lower = bucket
+        return counter
+
+    def __len__(self):
+        return len(self._bucket_of)
+
+    def __contains__(self, key):
+        return key in self._bucket_of
+
+    def count(self, key):
+        bucket = self._bucket_of.get(key)
+        return bucket.count if bucket else 0
+
+    def increment(self, key):
+        bucket = self._bucket_of.get(key)
+        if bucket is None:
+            self._first_seen[key] = len(self._first_seen)
+            target = self._tail if self._tail and self._tail.count == 1 else None
+            if target is None:
+                target = self._link(_Bucket(1), higher=self._tail, lower=None)
+        else:
+            target = bucket.higher
+            if target is None or target.count != bucket.count + 1:
+                target = self._link(_Bucket(bucket.count + 1), higher=bucket.higher, lower=bucket)
+            del bucket.keys[key]
+            if not bucket.keys:
+                self._unlink(bucket)
+        target.keys[key] = None
+        self._bucket_of[key] = target
+
+    def top(self, k):
+        # [(key, count), ...] highest first; equal counts in the order reached
+        result = []
+        bucket = self._head
+        while bucket is not None and len(result) < k:
+            for key in bucket.keys:
+                result.append((key, bucket.count))
+                if len(result) == k:
+                    break
+            bucket = bucket.lower
+        return result
+
+    def most_common_key(self):
+        # Highest count; ties go to the key seen first, like max() over a
+        # dict filled in event order
+        if self._head is None:
+            return None
+        return min(self._head.keys, key=self._first_seen.__getitem__)
+
+    def _link(self, bucket, higher, lower):
+        bucket.higher = higher
+        bucket.lower = lower
+        if higher is None:
+            self._head = bucket
+        else:
+            higher.lower = bucket
+        if lower is None:
+            self._tail = bucket
+        else:
+            lower.higher = bucket
+        return bucket
+
+    def _unlink(self, bucket):
+        if bucket.higher is None:
+            self._head = bucket.lower
+        else:
+            bucket.higher.lower = bucket.lower
+        if bucket.lower is None:
+            self._tail = bucket.higher
+        else:
+            bucket.lower.higher = bucket.higher
+
+
+#####################
+## Define BorrowStats class
+##### Borrow counts per genre, book, author and member, updated on every
+##### borrow. Rebuilt in one pass over the history when a Library loads.
+class BorrowStats:
+    def __init__(self):
+        self.genres = RankedCounter()
+        self.books = RankedCounter()
+        self.authors = RankedCounter()
+        self.members = RankedCounter()
+
+    def record_borrow(self, book, member_id):
+        self.genres.increment(book.genre)
+        self.books.increment(book.book_id)
+        self.authors.increment(book.author)
+        self.members.increment(member_id)
+
+    @staticmethod
+    def from_history(history, books_by_id, archived=None):
+        # archived: (book_counts, member_counts) of rows kept outside history
+        # (see archive.HistoryArchive), added to the counts from history
+        if hasattr(history, "book_codes"):
+            return BorrowStats._from_columns(history, books_by_id, archived)
+        stats = BorrowStats()
+        if archived:
+            return BorrowStats._from_counts(
+                Counter(archived[0]) + Counter(r.book_id for r in history),
+                Counter(archived[1]) + Counter(r.member_id for r in history if r.book_id in books_by_id),
+                books_by_id)
+        for record in history:
+            book = books_by_id.get(record.book_id)
+            if book:
+                stats.record_borrow(book, record.member_id)
+        return stats
+
+    @staticmethod
+    def _from_columns(history, books_by_id, archived=None):
+        # Fast path for a columnar BorrowHistory: count the interned codes in
+        # C, then aggregate per distinct book instead of per row
+        book_ids = history.book_table.ids
+        member_ids = history.member_table.ids
+        book_counts = Counter(history.book_codes)
+        missing = {code for code in book_counts if book_ids[code] not in books_by_id}
+        if missing:
+            member_counts = Counter(m for m, b in zip(history.member_codes, history.book_codes) if b not in missing)
+        else:
+            member_counts = Counter(history.member_codes)
+
+        book_counts = Counter({book_ids[code]: n for code, n in book_counts.items()})
+        member_counts = Counter({member_ids[code]: n for code, n in member_counts.items()})
+        if archived:
+            # Archived rows are older, so they come first for tie-breaks
+            book_counts = Counter(archived[0]) + book_counts
+            member_counts = Counter(archived[1]) + member_counts
+        return BorrowStats._from_counts(book_counts, member_counts, books_by_id)
+
+    @staticmethod
+    def _from_counts(book_counts, member_counts, books_by_id):
+        books, genres, authors = {}, {}, {}
+        for book_id, count in book_counts.items():
+            book = books_by_id.get(book_id)
+            if book is None:
+                continue
+            books[book_id] = count
+            genres[book.genre] = genres.get(book.genre, 0) + count
+            authors[book.author] = authors.get(book.author, 0) + count
+
+        stats = BorrowStats()
+        stats.books = RankedCounter.from_counts(books)
+        stats.genres = RankedCounter.from_counts(genres)
+        stats.authors = RankedCounter.from_counts(authors)
+        stats.members = RankedCounter.from_counts(dict(member_counts))
+        return stats
@@ -0,0 +1,76 @@
+# bulkimport.py
+
+import csv
+import json
+from datetime import date
+
+#####################
+## Define ImportReport class
+##### Outcome of a Library.bulk_* call: how many rows were applied and a
+##### (row_number, message) entry for every rejected row. Row numbers are
+##### 1-based positions in the input iterable (the first CSV data row is 1).
+class ImportReport:
+    def __init__(self):
+        self.added = 0
+        self.errors = []
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def __repr__(self):
+        return f"ImportReport(added={self.added}, failed={self.failed})"
+
+
+# --------------------------------------------
+# Row readers
+##### Both yield one dict per record. A line that cannot be parsed is
+##### yielded as a ValueError so the importer records it and carries on.
+# --------------------------------------------
+def read_csv(path):
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"Line {line_no}: invalid JSON ({e})")
+
+
+# --------------------------------------------
+# Field parsing for text sources (CSV gives every value as a string)
+# --------------------------------------------
+def parse_bool(value, default=True):
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "yes", "y", "1"):
+        return True
+    if text in ("false", "no", "n", "0"):
+        return False
+    raise ValueError(f"Invalid boolean value: {value!r}")
+
+def parse_int(value, field):
+    if isinstance(value, int):
+        return value
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{field} must be a whole number.")
+
+def parse_date(value, field, required=True):
+    if value is None or value == "":
+        if required:
+            raise ValueError(f"{field} is required.")
+        return None
+    try:
+        return date.fromisoformat(str(value).strip()).isoformat()
+    except ValueError:
+        raise ValueError(f"{field} must be a YYYY-MM-DD date.")
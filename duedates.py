@@ -0,0 +1,148 @@
+# duedates.py
+
+import threading
+from bisect import bisect_left, insort
+from collections import namedtuple
+from datetime import date
+
+from history import from_ordinal
+
+LOAN_DAYS = 14          # loan period: a book is due this many days after borrowed_on
+FINE_PER_DAY = 5        # fine per day a book is returned after its due date
+REMINDER_LEAD_DAYS = 2
+
+## An open loan with its due date (ISO dates)
+DueLoan = namedtuple("DueLoan", ["member_id", "book_id", "borrowed_on", "due_on"])
+
+#####################
+## Define DueIndex class
+##### Open loans bucketed by borrowed day (an ordinal): day -> {(member_id,
+##### book_id): entry}, plus the sorted list of days that have a bucket.
+##### Every loan runs for the same period, so borrowed-day order is also
+##### due-date order and a change of the period needs no rebuild. A date
+##### range is a bisect on the day list followed by the buckets inside it,
+##### so the overdue list and the due-soon window each cost O(d + k log k)
+##### for k loans on d days, and neither walks loans outside its range.
+##### A return removes its entry in O(1); only a bucket emptying touches
+##### the day list, which holds at most one key per calendar day.
+class DueIndex:
+    def __init__(self):
+        self._buckets = {}  # borrowed day -> {(member_id, book_id): entry}
+        self._days = []     # sorted days that have a bucket
+        self._day_of = {}   # (member_id, book_id) -> its borrowed day
+
+    def __len__(self):
+        return len(self._day_of)
+
+    def add(self, member_id, book_id, borrowed_day):
+        key = (member_id, book_id)
+        self.remove(member_id, book_id)
+        bucket = self._buckets.get(borrowed_day)
+        if bucket is None:
+            bucket = self._buckets[borrowed_day] = {}
+            insort(self._days, borrowed_day)
+        bucket[key] = (borrowed_day, member_id, book_id)
+        self._day_of[key] = borrowed_day
+
+    def remove(self, member_id, book_id):
+        key = (member_id, book_id)
+        day = self._day_of.pop(key, None)
+        if day is None:
+            return
+        bucket = self._buckets[day]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[day]
+            del self._days[bisect_left(self._days, day)]
+
+    def borrowed_between(self, first, end):
+        # (borrowed_day, member_id, book_id) entries with first <= borrowed_day
+        # < end (first may be None), oldest first
+        days = self._days
+        lo = 0 if first is None else bisect_left(days, first)
+        hi = bisect_left(days, end)
+        found = []
+        for day in days[lo:hi]:
+            found.extend(sorted(self._buckets[day].values()))
+        return found
+
+    def borrowed_before(self, day):
+        return self.borrowed_between(None, day)
+
+
+#####################
+## Define ReminderScheduler class
+##### Turns the due-date index into reminder events: "due_soon" once a loan
+##### is within lead_days of its due date and "overdue" once it is past it,
+##### each sent once per loan. run_once() collects the events for a date
+##### and hands them to notify(list_of_reminders) in batches of at most
+##### batch_size; start() repeats that every interval seconds on a
+##### background thread until close().
+Reminder = namedtuple("Reminder", ["kind", "member_id", "book_id", "borrowed_on", "due_on"])
+
+class ReminderScheduler:
+    def __init__(self, library, notify, lead_days=REMINDER_LEAD_DAYS, batch_size=100, interval=3600.0):
+        self.library = library
+        self.notify = notify
+        self.lead_days = lead_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.sent = 0
+        self.last_error = None  # exception from the last failed background run
+        self._sent_keys = set()  # (kind, member_id, book_id, borrowed_on)
+        self._stop = threading.Event()
+        self._worker = None
+
+    def run_once(self, as_of=None):
+        # Emit the reminders not yet sent as of as_of (ISO date, default
+        # today); returns how many were emitted
+        as_of = as_of or date.today().isoformat()
+        library = self.library
+        # Forget loans that have since been returned
+        self._sent_keys = {key for key in self._sent_keys if library.is_on_loan(*key[1:])}
+        events = []
+        for kind, loans in (("overdue", library.overdue_loans(as_of)),
+                            ("due_soon", library.loans_due_within(self.lead_days, as_of))):
+            for loan in loans:
+                if (kind,) + loan[:3] not in self._sent_keys:
+                    events.append(Reminder(kind, *loan))
+        for start in range(0, len(events), self.batch_size):
+            batch = events[start:start + self.batch_size]
+            self.notify(batch)
+            # Only delivered batches count as sent; if notify() raises, the
+            # rest are tried again on the next run
+            self._sent_keys.update(reminder[:4] for reminder in batch)
+            self.sent += len(batch)
+        return len(events)
+
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="reminders", daemon=True)
+            self._worker.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+            if self._stop.wait(self.interval):
+                return
+
+
+def fine_for(due_day, returned_day, fine_per_day=FINE_PER_DAY):
+    # Fine for a loan due on due_day and returned on returned_day (ordinals)
+    return max(0, returned_day - due_day) * fine_per_day
+
+
+def due_loan(entry, loan_days):
+    borrowed_day, member_id, book_id = entry
+    return DueLoan(member_id, book_id, from_ordinal(borrowed_day), from_ordinal(borrowed_day + loan_days))
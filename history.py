@@ -0,0 +1,211 @@
+# history.py
+
+from array import array
+from datetime import date
+
+#####################
+## Day ordinals
+##### Dates are stored as date.toordinal() ints; 0 means "no date"
+def to_ordinal(day):
+    return date.fromisoformat(day).toordinal() if day else 0
+
+def from_ordinal(ordinal):
+    return date.fromordinal(ordinal).isoformat() if ordinal else None
+
+
+#####################
+## Define InternTable class
+##### Maps string IDs to small ints and back, so each distinct ID is stored
+##### once no matter how many history rows mention it
+class InternTable:
+    __slots__ = ("ids", "codes")
+
+    def __init__(self):
+        self.ids = []
+        self.codes = {}
+
+    @staticmethod
+    def from_ids(ids):
+        # ids must be distinct; code i maps to ids[i]
+        table = InternTable()
+        table.ids = ids
+        table.codes = dict(zip(ids, range(len(ids))))
+        return table
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.ids)
+            self.ids.append(value)
+        return code
+
+
+#####################
+## Define BorrowRecordView class
+##### A BorrowRecord-compatible handle onto one row of a BorrowHistory.
+##### Reads go to the columns; setting returned_on (or closeRecord) writes
+##### back to the store.
+class BorrowRecordView:
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    @property
+    def member_id(self):
+        store = self._store
+        return store.member_table.ids[store.member_codes[self._row]]
+
+    @property
+    def book_id(self):
+        store = self._store
+        return store.book_table.ids[store.book_codes[self._row]]
+
+    @property
+    def borrowed_on(self):
+        return from_ordinal(self._store.borrowed_days[self._row])
+
+    @property
+    def returned_on(self):
+        return from_ordinal(self._store.returned_days[self._row])
+
+    @returned_on.setter
+    def returned_on(self, returned_on):
+        self._store.returned_days[self._row] = to_ordinal(returned_on)
+
+    def closeRecord(self, returned_on):
+        self.returned_on = returned_on
+
+    def to_dict(self):
+        return {
+            "member_id": self.member_id,
+            "book_id": self.book_id,
+            "borrowed_on": self.borrowed_on,
+            "returned_on": self.returned_on
+        }
+
+    def __eq__(self, other):
+        if isinstance(other, BorrowRecordView):
+            return self._store is other._store and self._row == other._row
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self._store), self._row))
+
+
+#####################
+## Define BorrowHistory class
+##### Columnar, append-only borrow history: one array per field with interned
+##### member/book IDs and day-ordinal dates (about 16 bytes per row instead
+##### of a BorrowRecord object with four strings). Behaves like the list it
+##### replaces: len(), iteration, indexing, reversed() and append() of
+##### BorrowRecord-like objects, handing out BorrowRecordView rows.
+class BorrowHistory:
+    def __init__(self, records=()):
+        self.member_table = InternTable()
+        self.book_table = InternTable()
+        self.member_codes = array("I")
+        self.book_codes = array("I")
+        self.borrowed_days = array("i")
+        self.returned_days = array("i")
+        self.extend(records)
+
+    @staticmethod
+    def from_dicts(rows):
+        history = BorrowHistory()
+        for r in rows:
+            history.add(r["member_id"], r["book_id"], r["borrowed_on"], r.get("returned_on"))
+        return history
+
+    @staticmethod
+    def from_columns(member_table, book_table, member_codes, book_codes, borrowed_days, returned_days):
+        # Adopt ready-made columns (e.g. from a binary snapshot) without a
+        # per-row Python loop
+        history = BorrowHistory()
+        history.member_table = member_table
+        history.book_table = book_table
+        history.member_codes = member_codes
+        history.book_codes = book_codes
+        history.borrowed_days = borrowed_days
+        history.returned_days = returned_days
+        return history
+
+    def add(self, member_id, book_id, borrowed_on, returned_on=None):
+        self.member_codes.append(self.member_table.code(member_id))
+        self.book_codes.append(self.book_table.code(book_id))
+        self.borrowed_days.append(to_ordinal(borrowed_on))
+        self.returned_days.append(to_ordinal(returned_on))
+        return BorrowRecordView(self, len(self.member_codes) - 1)
+
+    def append(self, record):
+        self.add(record.member_id, record.book_id, record.borrowed_on, record.returned_on)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.member_codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [BorrowRecordView(self, row) for row in range(len(self))[index]]
+        row = range(len(self))[index]  # normalizes negatives, raises IndexError
+        return BorrowRecordView(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield BorrowRecordView(self, row)
+
+    def __reversed__(self):
+        for row in range(len(self) - 1, -1, -1):
+            yield BorrowRecordView(self, row)
+
+    def open_records(self):
+        # Rows not yet returned, in borrow order
+        return [BorrowRecordView(self, row) for row, day in enumerate(self.returned_days) if day == 0]
+
+    def select(self, member_id=None, book_id=None, start=None, end=None):
+        # Row numbers matching every given filter; start/end bound borrowed_on
+        # (ISO dates, inclusive)
+        codes = {}
+        for name, table, value in (("member", self.member_table, member_id), ("book", self.book_table, book_id)):
+            if value is not None:
+                if value not in table.codes:
+                    return []
+                codes[name] = table.codes[value]
+        rows = range(len(self))
+        if "member" in codes:
+            code = codes["member"]
+            rows = [row for row in rows if self.member_codes[row] == code]
+        if "book" in codes:
+            code = codes["book"]
+            rows = [row for row in rows if self.book_codes[row] == code]
+        if start or end:
+            low, high = to_ordinal(start) or 0, to_ordinal(end) or 10 ** 7
+            days = self.borrowed_days
+            rows = [row for row in rows if low <= days[row] <= high]
+        return list(rows)
+
+    def split_closed_before(self, day):
+        # (kept, moved): a new BorrowHistory with every open row and every row
+        # borrowed on or after day (an ordinal), and the closed earlier rows
+        # as (member_id, book_id, borrowed_on, returned_on) tuples
+        kept = BorrowHistory()
+        moved = []
+        member_ids, book_ids = self.member_table.ids, self.book_table.ids
+        for m, b, borrowed, returned in zip(self.member_codes, self.book_codes, self.borrowed_days, self.returned_days):
+            if returned and borrowed < day:
+                moved.append((member_ids[m], book_ids[b], from_ordinal(borrowed), from_ordinal(returned)))
+            else:
+                kept.member_codes.append(kept.member_table.code(member_ids[m]))
+                kept.book_codes.append(kept.book_table.code(book_ids[b]))
+                kept.borrowed_days.append(borrowed)
+                kept.returned_days.append(returned)
+        return kept, moved
+
+    def nbytes(self):
+        # Size of the column arrays (excluding the intern tables)
+        columns = (self.member_codes, self.book_codes, self.borrowed_days, self.returned_days)
+        return sum(c.itemsize * len(c) for c in columns)
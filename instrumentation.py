@@ -0,0 +1,173 @@
+# instrumentation.py
+
+import bisect
+import functools
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+#####################
+## Latency histogram
+##### Fixed log-scale buckets from 1 microsecond to ~100 seconds, four per
+##### doubling, so percentiles are within ~10% and recording is one bisect.
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** (i / 4) for i in range(4 * 27))
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th observation, clamped to
+        # the observed range
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                bound = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                return min(max(bound, self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        summary = {"count": self.count, "total": self.total, "min": self.min, "max": self.max,
+                   "mean": self.total / self.count if self.count else None}
+        for q in QUANTILES:
+            summary[f"p{int(q * 100)}"] = self.percentile(q)
+        return summary
+
+
+#####################
+## Define Metrics class
+##### Process-wide registry of timers (name -> Histogram) and counters
+##### (name -> number). Everything is a no-op until enable() is called:
+##### timer() hands back a shared null context and add() returns at once.
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._timers = {}
+        self._counters = {}
+        self._started = time.time()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._timers = {}
+            self._counters = {}
+            self._started = time.time()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._timers.get(name)
+            if histogram is None:
+                histogram = self._timers[name] = Histogram()
+            histogram.observe(seconds)
+
+    def add(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def timer(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "uptime": time.time() - self._started,
+                "timers": {name: h.to_dict() for name, h in sorted(self._timers.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.stats(), indent=indent)
+
+    def to_prometheus(self, prefix="library"):
+        # Text exposition format: timers as summaries, counters as counters
+        stats = self.stats()
+        lines = [f"# HELP {prefix}_operation_seconds Latency of Library operations and persistence steps.",
+                 f"# TYPE {prefix}_operation_seconds summary"]
+        for name, summary in stats["timers"].items():
+            for q in QUANTILES:
+                value = summary[f"p{int(q * 100)}"]
+                lines.append(f'{prefix}_operation_seconds{{op="{name}",quantile="{q}"}} {value:.9f}')
+            lines.append(f'{prefix}_operation_seconds_sum{{op="{name}"}} {summary["total"]:.9f}')
+            lines.append(f'{prefix}_operation_seconds_count{{op="{name}"}} {summary["count"]}')
+        for name, value in stats["counters"].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+_NULL_TIMER = nullcontext()
+
+METRICS = Metrics()
+
+
+#####################
+## Method wrapping
+##### instrument() shadows the named methods on one object with timed
+##### wrappers (instance attributes), so objects that were never
+##### instrumented run the plain class methods with no extra work.
+def instrument(obj, names, metrics=METRICS):
+    for name in names:
+        method = getattr(obj, name)
+        setattr(obj, name, _timed(method, name, metrics))
+
+def _timed(method, name, metrics):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            metrics.add(f"{name}_errors")
+            raise
+        finally:
+            metrics.observe(name, time.perf_counter() - start)
+    return wrapper
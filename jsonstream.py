@@ -0,0 +1,114 @@
+# jsonstream.py
+
+import json
+
+_decoder = json.JSONDecoder()
+WHITESPACE = " \t\n\r"
+DELIMITERS = ",:]}" + WHITESPACE
+
+#####################
+## Define JsonStreamReader class
+##### Incremental reader for a top-level JSON object whose members are large
+##### arrays (the library_data.json layout). The file is read in chunks and
+##### only one array element is decoded at a time:
+#####
+#####     reader = JsonStreamReader(f)
+#####     for key in reader.keys():
+#####         if key == "books":
+#####             for item in reader.items(): ...
+#####         else:
+#####             value = reader.value()
+#####
+##### A member that the caller does not consume is skipped.
+class JsonStreamReader:
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self._consumed = True
+
+    def keys(self):
+        self._expect("{")
+        if self._peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self._decode()
+            self._expect(":")
+            self._consumed = False
+            yield key
+            if not self._consumed:
+                self.value()
+            if self._peek() == ",":
+                self.pos += 1
+                continue
+            self._expect("}")
+            return
+
+    def items(self):
+        self._consumed = True
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self._decode()
+            if self._peek() == ",":
+                self.pos += 1
+                continue
+            self._expect("]")
+            return
+
+    def value(self):
+        self._consumed = True
+        return self._decode()
+
+    # --------------------------------------------
+    # Buffer handling
+    # --------------------------------------------
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:
+            # Drop what has been consumed so the buffer stays about one chunk
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def _peek(self):
+        # Next non-whitespace character without consuming it; "" at EOF
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of file'!r} in JSON stream")
+        self.pos += 1
+
+    def _decode(self):
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A value that is not followed by a delimiter may be cut short
+                # (e.g. "1" of "1.5"), so only trust it once one follows
+                if self.eof or (end < len(self.buf) and self.buf[end] in DELIMITERS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
@@ -1,11 +1,39 @@
 import json
+import os
+import threading
+from collections import namedtuple
+from collections.abc import Mapping
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
+
+from persistence import Journal, SnapshotScheduler, atomic_write
+from textindex import TextIndex
+from borrowstats import BorrowStats
+from history import BorrowHistory, from_ordinal, to_ordinal
+from archive import HistoryArchive
+from jsonstream import JsonStreamReader
+from snapshot import read_snapshot, snapshot_bytes
+from bulkimport import ImportReport, parse_bool, parse_date, parse_int
+from locking import LockStripes, hold_all
+from instrumentation import METRICS, instrument
+from replicas import ReplicaPool
+from querycache import QueryCache
+from sortedids import SortedIds
+from duedates import FINE_PER_DAY, LOAN_DAYS, DueIndex, ReminderScheduler, due_loan, fine_for
+from validation import BOOK_VALIDATOR, MEMBER_VALIDATOR, ValidationError
+
+
+def today():
+    return datetime.now().strftime("%Y-%m-%d")
 
 #####################
 ## Define Book class
 ##### A simple class to store the attributes of a book
 ##### static method to create a Book object from a dictionary
 class Book:
+    __slots__ = ("book_id", "title", "author", "genre", "available")
+
     def __init__(self, book_id, title, author, genre, available=True):
         self.book_id = book_id
         self.title = title
@@ -13,6 +41,11 @@ class Book:
         self.genre = genre
         self.available = available
 
+    def __reduce__(self):
+        # Positional pickling: several times faster than the generic
+        # __slots__ state for the result lists replicas send back
+        return (Book, (self.book_id, self.title, self.author, self.genre, self.available))
+
     def to_dict(self):
         return {
             "book_id": self.book_id,
@@ -37,6 +70,8 @@ class Book:
 ##### A simple class to represent the attributes of a Member
 ##### static method to create a Member object from a dictionary
 class Member:
+    __slots__ = ("member_id", "name", "age", "contact", "_borrowed")
+
     def __init__(self, member_id, name, age, contact, borrowed_books=None):
         self.member_id = member_id
         self.name = name
@@ -44,26 +79,40 @@ class Member:
         self.contact = contact
         self.borrowed_books = borrowed_books or []
 
-    def add_borrowed_book(self, bookid, borrowed_on=datetime.now().strftime("%Y-%m-%d")):
-        borrowed_book = {
-            "book_id": book_id,
-            "borrowed_on": borrowed_on
-        }
-        self.borrowed_books.append(borrowed_book)
+    ##### Active borrows are kept as {book_id: borrowed_on} (insertion
+    ##### ordered) so lookups and removals are O(1); borrowed_books still
+    ##### reads and assigns as the original list of dicts.
+    @property
+    def borrowed_books(self):
+        return [{"book_id": book_id, "borrowed_on": on} for book_id, on in self._borrowed.items()]
+
+    @borrowed_books.setter
+    def borrowed_books(self, entries):
+        self._borrowed = {entry["book_id"]: entry.get("borrowed_on") for entry in entries}
+
+    def has_borrowed(self, book_id):
+        return book_id in self._borrowed
+
+    def borrowed_count(self):
+        return len(self._borrowed)
+
+    def add_borrowed_book(self, book_id, borrowed_on=None):
+        self._borrowed[book_id] = borrowed_on or today()
+
+    def borrowed_on(self, book_id):
+        # Date the member borrowed book_id, or None if they do not hold it
+        return self._borrowed.get(book_id)
 
     def remove_borrowed_book(self, book_id):
         # Check if member actually borrowed this book
-        active_record = None
-        for entry in self.borrowed_books:
-            if entry["book_id"] == book_id:
-                active_record = entry
-                break
-
-        if not active_record:
+        if book_id not in self._borrowed:
             raise ValueError("This member did not borrow the specified book.")
 
         # Remove from member's active borrow list
-        self.borrowed_books.remove(active_record)
+        del self._borrowed[book_id]
+
+    def __reduce__(self):
+        return (Member, (self.member_id, self.name, self.age, self.contact, self.borrowed_books))
 
     def to_dict(self):
         return {
@@ -84,15 +133,26 @@ class Member:
             borrowed_books=data.get("borrowed_books", [])
         )
 
+#####################
+## Page of a paginated query
+##### items: up to limit results; next_cursor: pass it back as cursor= for
+##### the following page, None once the results are exhausted. Cursors are
+##### keyset positions (catalog / registry order), so pages stay stable while
+##### other results are added or change state between calls.
+Page = namedtuple("Page", ["items", "next_cursor"])
+GENRE_CHUNK = 256  # doc ids iter_available_books_by_genre() reads per lock hold
+
 #####################
 ## Define BorrowRecord class
 ##### A simple class to store the attributes of a BorrowRecord
 ##### static method to create a BorrowRecord object from a dictionary
 class BorrowRecord:
-    def __init__(self, member_id, book_id, borrowed_on=datetime.now().strftime("%Y-%m-%d"), returned_on=None):
+    __slots__ = ("member_id", "book_id", "borrowed_on", "returned_on")
+
+    def __init__(self, member_id, book_id, borrowed_on=None, returned_on=None):
         self.member_id = member_id
         self.book_id = book_id
-        self.borrowed_on = borrowed_on
+        self.borrowed_on = borrowed_on or today()
         self.returned_on = returned_on
 
     def closeRecord(self, returned_on):
@@ -121,141 +181,1129 @@ class BorrowRecord:
 ##### This is the master class that ties all the above classes
 #####
 class Library:
-    def __init__(self, books=None, members=None, borrow_history=None, datafile=None):
+    def __init__(self, books=None, members=None, borrow_history=None, datafile=None, storage=None):
         self.books = books or []
         self.members = members or []
-        self.borrow_history = borrow_history or []
+        # Columnar store (see history.py); any iterable of records is accepted
+        if isinstance(borrow_history, BorrowHistory):
+            self._borrow_history = borrow_history
+        else:
+            self._borrow_history = BorrowHistory(borrow_history or [])
+        self._history_source = None  # paused stream when history loads lazily
+        self.archive = None  # HistoryArchive holding closed loans moved out of memory
         self.datafile = datafile or "library_data.json"
+        self.storage = storage
+        self.journal = None
+        self.compact_every = None
+        self.journal_seq = 0  # last journal seq folded into the snapshot
+        self._pending_log = None  # collects log records inside _log_batch()
+        self.autosave = None  # SnapshotScheduler once enable_autosave() is called
+        self.replicas = None  # ReplicaPool once enable_replicas() is called
+        self._instrumented = False
+        self.query_cache = QueryCache()  # None disables result caching
+        self.loan_days = LOAN_DAYS  # loans are due this many days after borrowing
+        self.fine_per_day = FINE_PER_DAY
+        self.reminders = None  # ReminderScheduler once enable_reminders() is called
+
+        # Locking, in global acquisition order: member stripes, book stripes,
+        # catalog (books/members lists, ID and text indexes), genre index,
+        # history (columns, open loans, stats). Checkouts of different books
+        # only meet on the short catalog/genre/history sections.
+        self._member_locks = LockStripes()
+        self._book_locks = LockStripes()
+        self._catalog_lock = threading.RLock()
+        self._genre_lock = threading.RLock()
+        self._history_lock = threading.RLock()
+        # One save at a time: save(), save_to_json(), journal compaction and
+        # the autosave scheduler (which calls save()) all take it
+        self._save_lock = threading.RLock()
+        self.rebuild_indexes()
+
+    def _loan_locks(self, member_id, book_id):
+        return hold_all([self._member_locks.lock_for(member_id)], [self._book_locks.lock_for(book_id)])
+
+    def _exclusive(self):
+        # Every lock: for snapshots, batches and index rebuilds
+        return hold_all(self._member_locks, self._book_locks,
+                        [self._catalog_lock, self._genre_lock, self._history_lock])
+
+    # --------------------------------------------
+    # Primary-key Indexes
+    ##### book_id -> Book and member_id -> Member dicts kept alongside the
+    ##### public lists. Every mutation below updates both; call
+    ##### rebuild_indexes() after editing self.books / self.members directly.
+    # --------------------------------------------
+    def rebuild_indexes(self):
+        with self._exclusive():
+            self._rebuild_indexes()
+
+    def _rebuild_indexes(self):
+        self._reset_indexes()
+        for b in self.books:
+            self._index_book(b)
+        for m in self.members:
+            self._members_by_id[m.member_id] = m
+        history = self.borrow_history
+        for record in history.open_records() if isinstance(history, BorrowHistory) else history:
+            if record.returned_on is None:
+                self._index_loan(record)
+        self._stats = BorrowStats.from_history(history, self._books_by_id, self._archived_counts())
+
+    def _reset_indexes(self):
+        self._books_by_id = {}
+        self._members_by_id = {}
+
+        # Full-text index over title/author; doc id = position in self.books
+        self._text_index = TextIndex()
+
+        # Genre index: normalized genre -> SortedIds of the doc ids of
+        # available copies (O(log n) flips, pages bisect to a cursor), plus
+        # per-genre [available, issued] counts
+        self._doc_ids = {}
+        self._available_by_genre = {}
+        self._genre_counts = {}
+
+        # Open loans: (member_id, book_id) -> open BorrowRecord, and
+        # member_id -> {book_id: open BorrowRecord}
+        self._open_loans = {}
+        self._loans_by_member = {}
+        # Open loans in due-date order (see duedates.py)
+        self._due_index = DueIndex()
+
+        # Borrow counters behind most_popular_genre and the top-N reports
+        self._stats = BorrowStats()
+
+        if self.query_cache is not None:
+            self.query_cache.clear()
+
+    def _index_book(self, book):
+        # Call before appending the book to self.books
+        doc_id = len(self._text_index)
+        self._books_by_id[book.book_id] = book
+        self._text_index.add(doc_id, title=book.title, author=book.author)
+        self._index_genre(book, doc_id)
+        if self.query_cache is not None:
+            self.query_cache.book_added(book)
+
+    def _attach_book(self, book):
+        with self._catalog_lock:
+            self._index_book(book)
+            self.books.append(book)
+
+    def _attach_member(self, member):
+        with self._catalog_lock:
+            self._members_by_id[member.member_id] = member
+            self.members.append(member)
+
+    def _add_record(self, member_id, book_id, borrowed_on, returned_on=None):
+        # Append a history row and index it
+        self._ensure_history()
+        with self._history_lock:
+            record = self._borrow_history.add(member_id, book_id, borrowed_on, returned_on)
+            self._index_record(record)
+        return record
+
+    def _index_record(self, record):
+        if record.returned_on is None:
+            self._index_loan(record)
+        book = self._books_by_id.get(record.book_id)
+        if book:
+            self._stats.record_borrow(book, record.member_id)
+
+    def _index_loan(self, record):
+        self._open_loans[(record.member_id, record.book_id)] = record
+        self._loans_by_member.setdefault(record.member_id, {})[record.book_id] = record
+        self._due_index.add(record.member_id, record.book_id, to_ordinal(record.borrowed_on))
+
+    def _history_stats(self):
+        # Callers read the stats under self._history_lock
+        self._ensure_history()
+        return self._stats
+
+    def _close_loan(self, member_id, book_id, returned_on):
+        # Close and unindex the open history record, if there is one
+        self._ensure_history()
+        with self._history_lock:
+            record = self._open_loans.pop((member_id, book_id), None)
+            if record is not None:
+                loans = self._loans_by_member[member_id]
+                del loans[book_id]
+                if not loans:
+                    del self._loans_by_member[member_id]
+                self._due_index.remove(member_id, book_id)
+                record.closeRecord(returned_on)
+        return record
+
+    def active_loans(self, member_id):
+        # Open BorrowRecords of a member, oldest first
+        self._ensure_history()
+        with self._history_lock:
+            return list(self._loans_by_member.get(member_id, {}).values())
+
+    def _index_genre(self, book, doc_id):
+        key = book.genre.lower()
+        with self._genre_lock:
+            self._doc_ids[book.book_id] = doc_id
+            available = self._available_by_genre.get(key)
+            if available is None:
+                available = self._available_by_genre[key] = SortedIds()
+            counts = self._genre_counts.setdefault(key, [0, 0])
+            if book.available:
+                available.add(doc_id)
+                counts[0] += 1
+            else:
+                counts[1] += 1
+
+    def _set_available(self, book, available):
+        # Flip availability and move the book between the genre index buckets
+        if book.available == available:
+            return
+        key = book.genre.lower()
+        with self._genre_lock:
+            book.available = available
+            doc_id = self._doc_ids[book.book_id]
+            counts = self._genre_counts[key]
+            if available:
+                self._available_by_genre[key].add(doc_id)
+                counts[0] += 1
+                counts[1] -= 1
+            else:
+                self._available_by_genre[key].discard(doc_id)
+                counts[0] -= 1
+                counts[1] += 1
+            if self.query_cache is not None:
+                self.query_cache.availability_changed(book)
 
     # --------------------------------------------
     # JSON Persistence
     # --------------------------------------------
+    def to_dict(self):
+        self._ensure_history()
+        with self._exclusive():
+            if self.journal is not None:
+                self.journal_seq = self.journal.seq
+            # journal_seq goes first so a streaming load knows it before history;
+            # history_archive comes after the catalog its counts refer to
+            data = {
+                "journal_seq": self.journal_seq,
+                "loan_policy": self.loan_policy(),
+                "books": [b.to_dict() for b in self.books],
+                "members": [m.to_dict() for m in self.members],
+            }
+            if self.archive is not None:
+                data["history_archive"] = self.archive.reference()
+            data["borrow_history"] = [r.to_dict() for r in self._borrow_history]
+            return data
+
+    @staticmethod
+    def from_dict(data, datafile=None):
+        books = [Book.from_dict(b) for b in data.get("books", [])]
+        members = [Member.from_dict(m) for m in data.get("members", [])]
+        history = BorrowHistory.from_dicts(data.get("borrow_history", []))
+
+        library = Library(books, members, history, datafile)
+        library.journal_seq = data.get("journal_seq", 0)
+        library._set_loan_policy(data.get("loan_policy"))
+        if data.get("history_archive"):
+            library.attach_archive(HistoryArchive(**data["history_archive"]))
+        return library
+
     def save_to_json(self):
-        data = {
-            "books": [b.to_dict() for b in self.books],
-            "members": [m.to_dict() for m in self.members],
-            "borrow_history": [r.to_dict() for r in self.borrow_history]
-        }
-        with open(self.datafile, "w") as f:
-            json.dump(data, f, indent=4)
+        if self.storage is not None:
+            # datafile is the backend's own path (e.g. library.db)
+            raise ValueError("Library is backed by storage; use save().")
+        with self._save_lock:
+            data = self.to_dict()
+            with METRICS.timer("json_encode"):
+                payload = json.dumps(data, indent=4)
+            with METRICS.timer("json_write"):
+                atomic_write(self.datafile, payload)
+            METRICS.add("json_bytes_written", len(payload))  # ASCII output: chars == bytes
+            if self.journal is not None:
+                # Snapshot now holds every journaled change up to journal_seq
+                self.journal.reset(keep_after=data["journal_seq"])
 
     @staticmethod
-    def load_from_json(filename="library_data.json"):
+    def load_from_json(filename="library_data.json", journal=False):
         try:
-            with open(filename, "r") as f:
+            with METRICS.timer("json_read"), open(filename, "r") as f:
                 data = json.load(f)
+                METRICS.add("json_bytes_read", os.fstat(f.fileno()).st_size)
         except FileNotFoundError:
-            return Library()
+            data = {}
 
-        books = [Book.from_dict(b) for b in data.get("books", [])]
-        members = [Member.from_dict(m) for m in data.get("members", [])]
-        history = [BorrowRecord.from_dict(r) for r in data.get("borrow_history", [])]
+        library = Library.from_dict(data, filename)
+        if journal:
+            library.enable_journal()
+        return library
+
+    # --------------------------------------------
+    # Binary Snapshot (see snapshot.py)
+    ##### Compact, memory-mappable alternative to the JSON file; use
+    ##### snapshot.SnapshotReader to look up single books or scan history
+    ##### without loading a Library.
+    # --------------------------------------------
+    def save_to_snapshot(self, filename):
+        # Encode under every lock, write after releasing them
+        self._ensure_history()
+        with self._exclusive():
+            data = snapshot_bytes(self)
+        atomic_write(filename, data, mode="wb")
+
+    @staticmethod
+    def load_from_snapshot(filename, datafile=None):
+        return read_snapshot(filename, datafile)
+
+    # --------------------------------------------
+    # Streaming Load
+    ##### load_streaming() parses library_data.json one array element at a
+    ##### time and indexes each object as it is built, so peak memory stays
+    ##### close to the loaded data. With lazy_history the stream is paused
+    ##### before borrow_history and resumed on first use of the history
+    ##### (reports, returns, borrows, saving), so the catalog is usable
+    ##### right away.
+    # --------------------------------------------
+    @staticmethod
+    def load_streaming(filename="library_data.json", journal=False, lazy_history=False):
+        library = Library(datafile=filename)
+        try:
+            f = open(filename, "r")
+        except FileNotFoundError:
+            f = None
+
+        if f is not None:
+            reader = JsonStreamReader(f)
+            library._history_source = {
+                "file": f, "reader": reader, "keys": reader.keys(),
+                "books_seen": False, "history_first": False, "journal_seq_seen": False
+            }
+            library._stream_sections(pause_at_history=lazy_history)
+            source = library._history_source
+            if journal and source is not None and not source["journal_seq_seen"]:
+                # Older layout with journal_seq after the history
+                library._ensure_history()
+        if journal:
+            library.enable_journal()
+        return library
+
+    @property
+    def borrow_history(self):
+        self._ensure_history()
+        return self._borrow_history
+
+    @borrow_history.setter
+    def borrow_history(self, history):
+        self._history_source = None
+        self._borrow_history = history
+
+    def _ensure_history(self):
+        if self._history_source is not None:
+            with self._catalog_lock, self._history_lock:
+                source = self._history_source
+                if source is not None and "rows" in source:
+                    # Storage backend with lazily loaded history
+                    history = self._borrow_history
+                    for data in source["rows"]():
+                        self._index_record(history.add(
+                            data["member_id"], data["book_id"], data["borrowed_on"], data.get("returned_on")))
+                    self._history_source = None
+                elif source is not None:
+                    self._stream_sections(resume_key="borrow_history")
+
+    def _stream_sections(self, pause_at_history=False, resume_key=None):
+        source = self._history_source
+        reader = source["reader"]
+        key = resume_key or next(source["keys"], None)
+        while key is not None:
+            if key == "books":
+                source["books_seen"] = True
+                for data in reader.items():
+                    self._attach_book(Book.from_dict(data))
+            elif key == "members":
+                for data in reader.items():
+                    self._attach_member(Member.from_dict(data))
+            elif key == "borrow_history":
+                if pause_at_history:
+                    return  # resumed by _ensure_history()
+                source["history_first"] = not source["books_seen"]
+                history = self._borrow_history
+                for data in reader.items():
+                    self._index_record(history.add(
+                        data["member_id"], data["book_id"], data["borrowed_on"], data.get("returned_on")))
+            elif key == "history_archive":
+                self.attach_archive(HistoryArchive(**reader.value()))
+            elif key == "loan_policy":
+                self._set_loan_policy(reader.value())
+            elif key == "journal_seq":
+                self.journal_seq = reader.value()
+                source["journal_seq_seen"] = True
+            key = next(source["keys"], None)
+
+        self._history_source = None
+        METRICS.add("json_bytes_read", os.fstat(source["file"].fileno()).st_size)
+        source["file"].close()
+        if source["history_first"]:
+            # Borrow stats need the catalog; index the history again
+            self._rebuild_indexes()
+
+    # --------------------------------------------
+    # History Archive (see archive.py)
+    ##### archive_history() moves closed loans borrowed before a cutoff month
+    ##### into compressed per-month files, so borrow_history only holds open
+    ##### loans and recent months. Reports still count archived loans. The
+    ##### history_for_member / history_for_book / history_between queries
+    ##### combine the in-memory rows with just the archive partitions that
+    ##### can match.
+    # --------------------------------------------
+    def archive_history(self, keep_months=3, before=None, path=None, compression="gzip"):
+        # Archive closed loans borrowed before `before` (ISO date) or before
+        # the first day of the month keep_months back; returns rows moved
+        if self.storage is not None:
+            raise ValueError("History archiving needs JSON persistence, not a storage backend.")
+        if before is None:
+            year, month = map(int, today()[:7].split("-"))
+            month -= keep_months
+            year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+            before = f"{year:04d}-{month:02d}-01"
+        self._ensure_history()
+        with self._exclusive():
+            kept, moved = self._borrow_history.split_closed_before(to_ordinal(before))
+            if not moved:
+                return 0
+            # A new archive starts from generation 0, past any left by a run
+            # that crashed before its snapshot was saved
+            archive = self.archive or HistoryArchive(path or f"{self.datafile}.archive", compression, generation=0)
+            by_month = {}
+            for row in moved:
+                by_month.setdefault(row[2][:7], []).append(row)
+            # Archive into a new generation, then drop the rows; the snapshot
+            # saved below refers to that generation and makes it final
+            archive.add(by_month)
+            self.archive = archive
+            self._borrow_history = kept
+            self._open_loans = {}
+            self._loans_by_member = {}
+            self._due_index = DueIndex()
+            for record in kept.open_records():
+                self._index_loan(record)
+        self.save()
+        archive.prune()
+        return len(moved)
+
+    def attach_archive(self, archive):
+        with self._history_lock:
+            self.archive = archive
+            self._stats = BorrowStats.from_history(self._borrow_history, self._books_by_id, self._archived_counts())
+
+    def _archived_counts(self):
+        if self.archive is None:
+            return None
+        return self.archive.book_counts, self.archive.member_counts
+
+    def history_for_member(self, member_id, start=None, end=None):
+        return self._history_query(member_id=member_id, start=start, end=end)
+
+    def history_for_book(self, book_id, start=None, end=None):
+        return self._history_query(book_id=book_id, start=start, end=end)
+
+    def history_between(self, start=None, end=None):
+        return self._history_query(start=start, end=end)
 
-        return Library(books, members, history, filename)
+    def _history_query(self, member_id=None, book_id=None, start=None, end=None):
+        # BorrowRecords sorted by borrowed_on, archived rows before in-memory
+        # ones on the same day
+        records = []
+        if self.archive is not None:
+            if member_id is not None:
+                rows = self.archive.rows_for_member(member_id, start, end)
+                if book_id is not None:
+                    rows = [row for row in rows if row[1] == book_id]
+            elif book_id is not None:
+                rows = self.archive.rows_for_book(book_id, start, end)
+            else:
+                rows = self.archive.rows_between(start, end)
+            records = [BorrowRecord(*row) for row in rows]
+        self._ensure_history()
+        with self._history_lock:
+            history = self._borrow_history
+            records.extend(BorrowRecord(**history[row].to_dict())
+                           for row in history.select(member_id, book_id, start, end))
+        records.sort(key=lambda r: r.borrowed_on)
+        return records
+
+    # --------------------------------------------
+    # Pluggable Storage Backends (see storage.py)
+    ##### Library.open(SqliteStorage("library.db")) loads from a backend and
+    ##### writes every mutation through to it. Backends with
+    ##### supports_queries answer the catalog queries and reports directly;
+    ##### with lazy_history (SqliteStorage, ShardedStorage) borrow history
+    ##### stays on disk until something needs it. datafile is the backend's
+    ##### path, so such a library saves with save(), never save_to_json().
+    # --------------------------------------------
+    @staticmethod
+    def open(storage):
+        library = Library.from_dict(storage.load(), getattr(storage, "path", None))
+        library.storage = storage
+        if storage.lazy_history:
+            # History comes from storage.load_history() on first use
+            library._history_source = {"rows": storage.load_history}
+        return library
+
+    def save(self):
+        with self._save_lock:
+            if self.storage is None:
+                self.save_to_json()
+                return
+            if not self.storage.lazy_history:
+                self._ensure_history()
+            with self._exclusive():
+                if self.journal is not None:
+                    self.journal_seq = self.journal.seq
+                self.storage.save(self)
+            if self.journal is not None:
+                self.journal.reset(keep_after=self.journal_seq)
+
+    def _storage_queries(self):
+        return self.storage is not None and self.storage.supports_queries
+
+    # --------------------------------------------
+    # Append-only Journal
+    ##### In journal mode each add/borrow/return appends one compact record
+    ##### (write-ahead: after validation, before the in-memory change).
+    ##### save() (save_to_json() without a storage backend) doubles as
+    ##### compaction: it writes a fresh snapshot and empties the journal. With compact_every set, that happens
+    ##### automatically once the journal holds that many records.
+    # --------------------------------------------
+    def enable_journal(self, path=None, compact_every=1000, fsync=True):
+        journal = Journal(path or f"{self.datafile}.journal", fsync=fsync)
+        for record in journal.replay(after_seq=self.journal_seq):
+            self._apply_journal_record(record)
+        self.journal = journal
+        self.compact_every = compact_every
+        return journal
+
+    def _apply_journal_record(self, record):
+        op = record["op"]
+        if op == "add_book":
+            self.add_book(Book.from_dict(record["book"]))
+        elif op == "add_member":
+            self.add_member(Member.from_dict(record["member"]))
+        elif op == "borrow":
+            self.borrow_book(record["member_id"], record["book_id"], borrowed_on=record["on"])
+        elif op == "return":
+            self.return_book(record["member_id"], record["book_id"], returned_on=record["on"])
+        elif op == "import_loan":
+            self._import_loan(self._members_by_id[record["member_id"]], self._books_by_id[record["book_id"]],
+                              record["borrowed_on"], record["returned_on"])
+        else:
+            raise ValueError(f"Unknown journal operation: {op}")
+
+    def _log(self, op, **data):
+        if self.autosave is not None:
+            self.autosave.mark()
+        if self.replicas is not None:
+            self.replicas.mark()
+        if self._pending_log is not None:
+            self._pending_log.append((op, data))
+            return
+        if self.storage is not None:
+            self.storage.record(op, **data)
+        if self.journal is not None:
+            self.journal.append(op, **data)
+
+    @contextmanager
+    def _log_batch(self):
+        # Collect the records of several operations and persist them with one
+        # storage transaction / one journal write when the block ends. The
+        # batch holds every lock, so no other thread's record can slip in
+        # between an operation and its deferred log write.
+        if self._pending_log is not None:
+            yield  # already inside a batch
+            return
+        self._ensure_history()
+        with self._exclusive():
+            self._pending_log = []
+            try:
+                yield
+            finally:
+                records, self._pending_log = self._pending_log, None
+                if records:
+                    if self.storage is not None:
+                        self.storage.record_batch(records)
+                    if self.journal is not None:
+                        self.journal.append_batch(records)
+
+    # --------------------------------------------
+    # Instrumentation (see instrumentation.py)
+    ##### Opt-in: enable_instrumentation() wraps this library's public
+    ##### methods with timers and switches on the process-wide METRICS
+    ##### registry, which also times JSON encode/write and journal fsyncs
+    ##### and counts bytes read and written. Libraries that never enable
+    ##### it run the plain methods.
+    # --------------------------------------------
+    INSTRUMENTED = (
+        "find_book_by_id", "find_member_by_id", "add_book", "add_member", "search_books", "search",
+        "get_available_books_by_genre", "genre_availability", "bulk_add_books", "bulk_add_members",
+        "bulk_import_history", "borrow_book", "return_book", "borrow_many", "return_many",
+        "list_members_with_borrows", "most_popular_genre", "top_genres", "top_authors", "top_books",
+        "top_members", "borrow_count", "to_dict", "save", "save_to_json", "save_to_snapshot", "flush",
+        "search_books_page", "available_books_by_genre_page", "members_with_borrows_page",
+    )
+
+    def enable_instrumentation(self):
+        METRICS.enable()
+        if not self._instrumented:
+            instrument(self, self.INSTRUMENTED)
+            self._instrumented = True
+        return METRICS
+
+    def stats(self):
+        # Timers (count, mean, p50/p95/p99 in seconds) and counters
+        return METRICS.stats()
+
+    def dump_stats(self, fmt="json"):
+        if fmt == "json":
+            return METRICS.to_json()
+        if fmt == "prometheus":
+            return METRICS.to_prometheus()
+        raise ValueError(f"Unknown stats format: {fmt}")
+
+    # --------------------------------------------
+    # Background Snapshots
+    ##### enable_autosave() moves snapshot writes off the caller's path:
+    ##### every change marks the library dirty and a background thread
+    ##### writes one snapshot (save()) per burst, at most max_delay seconds
+    ##### or max_pending changes after the first unsaved one. flush() writes
+    ##### immediately; close() flushes and stops the thread. With a journal
+    ##### the scheduler also takes over compaction.
+    # --------------------------------------------
+    def enable_autosave(self, max_delay=2.0, max_pending=100):
+        if self.autosave is None:
+            self.autosave = SnapshotScheduler(self.save, max_delay, max_pending)
+            self.compact_every = None
+        return self.autosave
+
+    def flush(self):
+        if self.autosave is not None:
+            self.autosave.flush()
+        else:
+            self.save()
+
+    def close(self):
+        if self.reminders is not None:
+            self.reminders.close()
+            self.reminders = None
+        if self.replicas is not None:
+            self.replicas.close()
+            self.replicas = None
+        if self.autosave is not None:
+            self.autosave.close(flush=True)
+            self.autosave = None
+        if self.journal is not None:
+            self.journal.close()
+        if self.storage is not None:
+            self.storage.close()
+
+    # --------------------------------------------
+    # Read Replicas (see replicas.py)
+    ##### enable_replicas() starts worker processes that answer read
+    ##### queries from a snapshot of this library, republished in the
+    ##### background after writes. This process stays the only writer;
+    ##### send reads through library.replicas.query("search_books", ...).
+    # --------------------------------------------
+    def enable_replicas(self, workers=None, max_delay=0.5, max_pending=100, path=None):
+        if self.replicas is None:
+            self._ensure_history()
+            self.replicas = ReplicaPool(self, workers, path, max_delay, max_pending)
+        return self.replicas
+
+    def _maybe_compact(self):
+        # Must be called without holding any Library lock. Inside a
+        # _log_batch() the snapshot would already hold the batch's changes
+        # while its journal records are still to be written, so only the
+        # call after the batch compacts.
+        if self._pending_log is not None:
+            return
+        if self.journal is not None and self.compact_every and self.journal.pending >= self.compact_every:
+            # Skip if a save is already running; it empties the journal too
+            if self._save_lock.acquire(blocking=False):
+                try:
+                    self.save()
+                finally:
+                    self._save_lock.release()
+
+    # --------------------------------------------
+    # Query Result Cache (see querycache.py)
+    ##### search_books() and get_available_books_by_genre() results are
+    ##### kept in an LRU keyed on the normalized arguments; adding a book
+    ##### and checkouts/returns evict only the entries they affect. Set
+    ##### library.query_cache = None to turn it off, or assign
+    ##### QueryCache(maxsize) to resize it.
+    # --------------------------------------------
+    def _cached(self, key, compute):
+        cache = self.query_cache
+        if cache is None:
+            return compute()
+        hit, result, epoch = cache.lookup(key)
+        if hit:
+            return list(result)
+        result = compute()
+        cache.store(key, result, epoch)
+        return result
+
+    def cache_stats(self):
+        # Hits, misses, hit rate, LRU evictions and invalidations
+        return self.query_cache.stats() if self.query_cache is not None else None
 
     # --------------------------------------------
     # Helper Lookups
     # --------------------------------------------
     def find_book_by_id(self, book_id):
-        return next((b for b in self.books if b.book_id == book_id), None)
+        return self._books_by_id.get(book_id)
 
     def find_member_by_id(self, member_id):
-        return next((m for m in self.members if m.member_id == member_id), None)
+        return self._members_by_id.get(member_id)
 
     # --------------------------------------------
     # Book Operations
     # --------------------------------------------
     def add_book(self, book):
-        if self.find_book_by_id(book.book_id):
-            raise ValueError("Book ID already exists.")
-        self.books.append(book)
+        with self._book_locks.lock_for(book.book_id):
+            if book.book_id in self._books_by_id:
+                raise ValueError("Book ID already exists.")
+            self._log("add_book", book=book.to_dict())
+            self._attach_book(book)
+        self._maybe_compact()
 
     def search_books(self, title=None, author=None):
-        results = self.books
-        if title:
-            results = [b for b in results if title.lower() in b.title.lower()]
-        if author:
-            results = [b for b in results if author.lower() in b.author.lower()]
-        return results
+        # Compatibility mode: case-insensitive substring match on title and/or
+        # author, results in catalog order, answered from the text index.
+        if not title and not author and not self._storage_queries():
+            return self.books
+        return self._cached(QueryCache.search_key(title, author), lambda: self._search_books(title, author))
+
+    def _search_books(self, title, author):
+        if self._storage_queries():
+            return [self._books_by_id[i] for i in self.storage.search_books(title, author)]
+
+        if not title and not author:
+            return self.books
+        with self._catalog_lock:
+            doc_ids = None
+            if title:
+                doc_ids = self._text_index.substring_matches("title", title)
+            if author:
+                author_ids = self._text_index.substring_matches("author", author, within=doc_ids)
+                doc_ids = author_ids
+            return [self.books[i] for i in doc_ids]
+
+    def search(self, query, limit=20):
+        # Ranked search: every word of query must match (as a word, prefix or
+        # substring) in the title or author; best matches first.
+        with self._catalog_lock:
+            return [self.books[i] for i in self._text_index.search(query, limit)]
 
     def get_available_books_by_genre(self, genre):
-        return [
-            b for b in self.books
-            if b.genre.lower() == genre.lower() and b.available
-        ]
+        return self._cached(QueryCache.genre_key(genre), lambda: self._available_books_by_genre(genre))
+
+    def _available_books_by_genre(self, genre):
+        if self._storage_queries():
+            return [self._books_by_id[i] for i in self.storage.get_available_books_by_genre(genre)]
+
+        with self._genre_lock:
+            doc_ids = list(self._available_by_genre.get(genre.lower(), ()))
+        return [self.books[i] for i in doc_ids]
+
+    def genre_availability(self, genre=None):
+        # {"available": n, "issued": m} for one genre, or a dict of those
+        # keyed by normalized genre when genre is None
+        with self._genre_lock:
+            if genre is not None:
+                available, issued = self._genre_counts.get(genre.lower(), (0, 0))
+                return {"available": available, "issued": issued}
+            return {
+                key: {"available": available, "issued": issued}
+                for key, (available, issued) in self._genre_counts.items()
+            }
+
+    # --------------------------------------------
+    # Paged and Streaming Queries
+    ##### iter_*() generators yield results as they are found and
+    ##### *_page() methods return one Page; both stop working once the
+    ##### caller has enough, instead of building the whole list. Results
+    ##### come in catalog (registry) order. They are answered from the
+    ##### in-memory indexes even with a storage backend, and skip the
+    ##### query cache.
+    # --------------------------------------------
+    def iter_search_books(self, title=None, author=None):
+        with self._catalog_lock:
+            matches = self._text_index.iter_substring_matches({"title": title, "author": author})
+        # Documents only ever get appended, so the rest can run unlocked
+        books = self.books
+        for i in matches:
+            yield books[i]
+
+    def search_books_page(self, title=None, author=None, limit=20, cursor=None):
+        if limit < 1:
+            raise ValueError("limit must be at least 1.")
+        after = -1 if cursor is None else cursor
+        with self._catalog_lock:
+            matches = self._text_index.iter_substring_matches({"title": title, "author": author}, after)
+            doc_ids = list(islice(matches, limit + 1))
+            books = [self.books[i] for i in doc_ids[:limit]]
+        return Page(books, doc_ids[limit - 1] if len(doc_ids) > limit else None)
+
+    def iter_available_books_by_genre(self, genre):
+        # Books that are still available when they are reached, read from
+        # the sorted genre index GENRE_CHUNK doc ids at a time
+        key = genre.lower()
+        after = -1
+        books = self.books
+        while True:
+            with self._genre_lock:
+                docs = self._available_by_genre.get(key)
+                doc_ids = docs.after(after, GENRE_CHUNK) if docs is not None else []
+            if not doc_ids:
+                return
+            for i in doc_ids:
+                book = books[i]
+                if book.available:
+                    yield book
+            after = doc_ids[-1]
+
+    def available_books_by_genre_page(self, genre, limit=20, cursor=None):
+        if limit < 1:
+            raise ValueError("limit must be at least 1.")
+        after = -1 if cursor is None else cursor
+        with self._genre_lock:
+            docs = self._available_by_genre.get(genre.lower())
+            doc_ids = docs.after(after, limit + 1) if docs is not None else []
+        books = [self.books[i] for i in doc_ids[:limit]]
+        return Page(books, doc_ids[limit - 1] if len(doc_ids) > limit else None)
+
+    def iter_members_with_borrows(self):
+        members = self.members
+        for i in range(len(members)):
+            if members[i].borrowed_count() > 0:
+                yield members[i]
+
+    def members_with_borrows_page(self, limit=20, cursor=None):
+        if limit < 1:
+            raise ValueError("limit must be at least 1.")
+        start = 0 if cursor is None else cursor + 1
+        members = self.members
+        found = []
+        for i in range(start, len(members)):
+            if members[i].borrowed_count() > 0:
+                found.append(i)
+                if len(found) > limit:
+                    break
+        return Page([members[i] for i in found[:limit]], found[limit - 1] if len(found) > limit else None)
 
     # --------------------------------------------
     # Member Operations
     # --------------------------------------------
     def add_member(self, member):
-        if self.find_member_by_id(member.member_id):
-            raise ValueError("Member ID already exists.")
-        self.members.append(member)
+        with self._member_locks.lock_for(member.member_id):
+            if member.member_id in self._members_by_id:
+                raise ValueError("Member ID already exists.")
+            self._log("add_member", member=member.to_dict())
+            self._attach_member(member)
+        self._maybe_compact()
+
+    # --------------------------------------------
+    # Bulk Import
+    ##### Rows are dicts (e.g. from bulkimport.read_csv / read_jsonl) or
+    ##### Book/Member objects. Each row is validated with the validation.py
+    ##### rules and checked for duplicates against the ID indexes; bad rows
+    ##### are reported in the returned ImportReport and skipped. All accepted
+    ##### rows are persisted together when the call ends.
+    # --------------------------------------------
+    def bulk_add_books(self, rows):
+        report = ImportReport()
+        with self._log_batch():
+            for row_no, (row, errors) in enumerate(BOOK_VALIDATOR.iter_validate(rows), start=1):
+                try:
+                    if isinstance(row, Exception):
+                        raise row
+                    if isinstance(row, Book):
+                        # Same rules as dict rows
+                        errors = BOOK_VALIDATOR.validate(row.to_dict())
+                    elif not isinstance(row, Mapping):
+                        raise ValueError("Row is not a book record.")
+                    if errors:
+                        raise ValueError(" ".join(e.message for e in errors))
+                    if not isinstance(row, Book):
+                        row = Book(row["book_id"].strip(), row["title"].strip(), row["author"].strip(),
+                                   row["genre"].strip(), parse_bool(row.get("available")))
+                    if row.book_id in self._books_by_id:
+                        raise ValueError("Book ID already exists.")
+                except (ValueError, ValidationError) as e:
+                    report.errors.append((row_no, str(e)))
+                    continue
+                self._log("add_book", book=row.to_dict())
+                self._attach_book(row)
+                report.added += 1
+        self._maybe_compact()
+        return report
+
+    def bulk_add_members(self, rows):
+        report = ImportReport()
+        with self._log_batch():
+            for row_no, (row, errors) in enumerate(MEMBER_VALIDATOR.iter_validate(rows), start=1):
+                try:
+                    if isinstance(row, Exception):
+                        raise row
+                    if isinstance(row, Member):
+                        # Same rules as dict rows
+                        errors = MEMBER_VALIDATOR.validate(row.to_dict())
+                    elif not isinstance(row, Mapping):
+                        raise ValueError("Row is not a member record.")
+                    if errors:
+                        raise ValueError(" ".join(e.message for e in errors))
+                    if not isinstance(row, Member):
+                        row = Member(row["member_id"].strip(), row["name"].strip(), parse_int(row["age"], "age"),
+                                     str(row["contact"]).strip())
+                    if row.member_id in self._members_by_id:
+                        raise ValueError("Member ID already exists.")
+                except (ValueError, ValidationError) as e:
+                    report.errors.append((row_no, str(e)))
+                    continue
+                self._log("add_member", member=row.to_dict())
+                self._attach_member(row)
+                report.added += 1
+        self._maybe_compact()
+        return report
+
+    def bulk_import_history(self, rows):
+        # Historical loans, oldest first: member_id, book_id, borrowed_on and
+        # an optional returned_on. Rows without returned_on become open loans.
+        report = ImportReport()
+        with self._log_batch():
+            for row_no, row in enumerate(rows, start=1):
+                try:
+                    if isinstance(row, Exception):
+                        raise row
+                    if not isinstance(row, Mapping):
+                        if not hasattr(row, "to_dict"):
+                            raise ValueError("Row is not a loan record.")
+                        row = row.to_dict()
+                    member = self._members_by_id.get(row.get("member_id"))
+                    if not member:
+                        raise ValueError("Member does not exist.")
+                    book = self._books_by_id.get(row.get("book_id"))
+                    if not book:
+                        raise ValueError("Book does not exist.")
+                    borrowed_on = parse_date(row.get("borrowed_on"), "borrowed_on")
+                    returned_on = parse_date(row.get("returned_on"), "returned_on", required=False)
+                    if returned_on is not None and returned_on < borrowed_on:
+                        raise ValueError("returned_on is before borrowed_on.")
+                    if returned_on is None and not book.available:
+                        raise ValueError("Book is already borrowed.")
+                except ValueError as e:
+                    report.errors.append((row_no, str(e)))
+                    continue
+                self._log("import_loan", member_id=member.member_id, book_id=book.book_id,
+                          borrowed_on=borrowed_on, returned_on=returned_on)
+                self._import_loan(member, book, borrowed_on, returned_on)
+                report.added += 1
+        self._maybe_compact()
+        return report
+
+    def _import_loan(self, member, book, borrowed_on, returned_on):
+        self._add_record(member.member_id, book.book_id, borrowed_on, returned_on)
+        if returned_on is None:
+            self._set_available(book, False)
+            member.add_borrowed_book(book.book_id, borrowed_on)
 
     # --------------------------------------------
     # Borrow Operations
     # --------------------------------------------
-    def borrow_book(self, member_id, book_id):
-        member = self.find_member_by_id(member_id)
-        if not member:
-            raise ValueError("Member does not exist.")
+    def borrow_book(self, member_id, book_id, borrowed_on=None):
+        # The member and book locks make the availability check and the
+        # checkout one step, so two desks cannot issue the same copy.
+        # Lazy history is loaded first: a write-through backend would
+        # otherwise hand back the row logged below as already loaded.
+        self._ensure_history()
+        with self._loan_locks(member_id, book_id):
+            member = self.find_member_by_id(member_id)
+            if not member:
+                raise ValueError("Member does not exist.")
 
-        book = self.find_book_by_id(book_id)
-        if not book:
-            raise ValueError("Book does not exist.")
+            book = self.find_book_by_id(book_id)
+            if not book:
+                raise ValueError("Book does not exist.")
 
-        if not book.available:
-            raise ValueError("Book is already borrowed.")
+            if not book.available:
+                raise ValueError("Book is already borrowed.")
 
-        # Mark book unavailable
-        book.available = False
+            borrowed_on = borrowed_on or today()
+            self._log("borrow", member_id=member_id, book_id=book_id, on=borrowed_on)
 
-        # Add to member's active borrow list
-        member.add_borrowed_book(book_id=book_id)
+            # Mark book unavailable
+            self._set_available(book, False)
 
-        # Add to borrow history log
-        record = BorrowRecord(member_id=member_id, book_id=book_id)
-        self.borrow_history.append(record)
+            # Add to member's active borrow list
+            member.add_borrowed_book(book_id=book_id, borrowed_on=borrowed_on)
+
+            # Add to borrow history log
+            self._add_record(member_id, book_id, borrowed_on)
+        self._maybe_compact()
 
     # --------------------------------------------
     # Return Operation
     # --------------------------------------------
-    def return_book(self, member_id, book_id):
-        member = self.find_member_by_id(member_id)
-        if not member:
-            raise ValueError("Member does not exist.")
+    def return_book(self, member_id, book_id, returned_on=None):
+        self._ensure_history()  # before _log, as in borrow_book
+        with self._loan_locks(member_id, book_id):
+            member = self.find_member_by_id(member_id)
+            if not member:
+                raise ValueError("Member does not exist.")
+
+            book = self.find_book_by_id(book_id)
+            if not book:
+                raise ValueError("Book does not exist.")
+
+            if not member.has_borrowed(book_id):
+                raise ValueError("This member did not borrow the specified book.")
+
+            returned_on = returned_on or today()
+            self._log("return", member_id=member_id, book_id=book_id, on=returned_on)
+
+            held_since = member.borrowed_on(book_id)
+            member.remove_borrowed_book(book_id=book_id)
+
+            # Mark book available again
+            self._set_available(book, True)
+
+            # Close the open borrow history record
+            record = self._close_loan(member_id, book_id, returned_on)
+
+            # Fine for days past the due date, from the loan's own borrowed_on
+            # (the date overdue_loans() goes by)
+            borrowed_on = record.borrowed_on if record is not None else held_since
+            fine = 0
+            if borrowed_on:
+                fine = fine_for(to_ordinal(borrowed_on) + self.loan_days, to_ordinal(returned_on), self.fine_per_day)
+        self._maybe_compact()
+        return fine
+
+    # --------------------------------------------
+    # Batch Checkout / Return
+    ##### borrow_many / return_many take (member_id, book_id) pairs, e.g. a
+    ##### scanned cart. Every item is attempted in order and gets its own
+    ##### result; the successful ones are persisted together in one journal
+    ##### write or storage transaction when the batch ends.
+    # --------------------------------------------
+    def borrow_many(self, pairs, borrowed_on=None):
+        return self._apply_many(self.borrow_book, pairs, borrowed_on)
 
-        book = self.find_book_by_id(book_id)
-        if not book:
-            raise ValueError("Book does not exist.")
+    def return_many(self, pairs, returned_on=None):
+        # Each successful result also carries the "fine" charged
+        return self._apply_many(self.return_book, pairs, returned_on, result_key="fine")
+
+    def _apply_many(self, operation, pairs, on, result_key=None):
+        results = []
+        with self._log_batch():
+            for member_id, book_id in pairs:
+                try:
+                    value = operation(member_id, book_id, on)
+                    results.append({"member_id": member_id, "book_id": book_id, "ok": True, "error": None})
+                    if result_key:
+                        results[-1][result_key] = value
+                except ValueError as e:
+                    results.append({"member_id": member_id, "book_id": book_id, "ok": False, "error": str(e)})
+        self._maybe_compact()
+        return results
+
+    # --------------------------------------------
+    # Due Dates, Overdue Loans and Reminders (see duedates.py)
+    ##### A loan is due loan_days after it was borrowed; return_book()
+    ##### charges fine_per_day for each day after that. Both are saved
+    ##### with the JSON snapshot ("loan_policy"). Open loans are kept in
+    ##### day buckets by due date, so the overdue and due-soon lists cost
+    ##### about O(k log k) for k results rather than a scan of the history.
+    # --------------------------------------------
+    def loan_policy(self):
+        return {"loan_days": self.loan_days, "fine_per_day": self.fine_per_day}
 
-        member.remove_borrowed_book(book_id=book_id)
+    def _set_loan_policy(self, policy):
+        if policy:
+            self.loan_days = policy.get("loan_days", LOAN_DAYS)
+            self.fine_per_day = policy.get("fine_per_day", FINE_PER_DAY)
 
-        # Mark book available again
-        book.available = True
+    def due_date(self, borrowed_on):
+        return from_ordinal(to_ordinal(borrowed_on) + self.loan_days)
 
-        # Update borrow history record where returned_on is None
-        for record in reversed(self.borrow_history):
-            if record.book_id == book_id and record.member_id == member_id and record.returned_on is None:
-                record.returned_on = datetime.now().strftime("%Y-%m-%d")
-                break
+    def overdue_loans(self, as_of=None):
+        # DueLoans still out after their due date, as of as_of (ISO date,
+        # default today), most overdue first
+        cutoff = to_ordinal(as_of or today()) - self.loan_days
+        self._ensure_history()
+        with self._history_lock:
+            entries = self._due_index.borrowed_before(cutoff)
+        return [due_loan(entry, self.loan_days) for entry in entries]
+
+    def loans_due_within(self, days, as_of=None):
+        # DueLoans falling due from as_of (inclusive) to days later, soonest first
+        first = to_ordinal(as_of or today()) - self.loan_days
+        self._ensure_history()
+        with self._history_lock:
+            entries = self._due_index.borrowed_between(first, first + days + 1)
+        return [due_loan(entry, self.loan_days) for entry in entries]
+
+    def is_on_loan(self, member_id, book_id, borrowed_on=None):
+        # Whether member_id still holds book_id (from that borrowed_on, if given)
+        member = self._members_by_id.get(member_id)
+        held_since = member.borrowed_on(book_id) if member else None
+        return held_since is not None and borrowed_on in (None, held_since)
+
+    def enable_reminders(self, notify, lead_days=2, batch_size=100, interval=3600.0):
+        # Start a background ReminderScheduler calling notify(list of Reminder)
+        if self.reminders is None:
+            self.reminders = ReminderScheduler(self, notify, lead_days, batch_size, interval).start()
+        return self.reminders
 
     # --------------------------------------------
     # Reports
     # --------------------------------------------
     def list_members_with_borrows(self):
-        return [m for m in self.members if len(m.borrowed_books) > 0]
+        if self._storage_queries():
+            return [self._members_by_id[i] for i in self.storage.list_members_with_borrows()]
+        return [m for m in self.members if m.borrowed_count() > 0]
 
     def most_popular_genre(self):
-        if not self.borrow_history:
-            return None
+        if self._storage_queries():
+            return self.storage.most_popular_genre()
 
         # Count only based on borrow events, not availability
-        genre_counts = {}
-        for record in self.borrow_history:
-            book = self.find_book_by_id(record.book_id)
-            if book:
-                genre_counts[book.genre] = genre_counts.get(book.genre, 0) + 1
-
-        # Find genre with max count
-        return max(genre_counts, key=genre_counts.get)
+        stats = self._history_stats()
+        with self._history_lock:
+            return stats.genres.most_common_key()
+
+    def top_genres(self, n=10):
+        stats = self._history_stats()
+        with self._history_lock:
+            return stats.genres.top(n)
+
+    def top_authors(self, n=10):
+        stats = self._history_stats()
+        with self._history_lock:
+            return stats.authors.top(n)
+
+    def top_books(self, n=10):
+        stats = self._history_stats()
+        with self._history_lock:
+            top = stats.books.top(n)
+        return [(self._books_by_id[book_id], count) for book_id, count in top]
+
+    def top_members(self, n=10):
+        stats = self._history_stats()
+        with self._history_lock:
+            top = stats.members.top(n)
+        return [(self._members_by_id.get(member_id), count) for member_id, count in top]
+
+    def borrow_count(self, book_id):
+        stats = self._history_stats()
+        with self._history_lock:
+            return stats.books.count(book_id)
@@ -0,0 +1,31 @@
+# locking.py
+
+import threading
+from contextlib import ExitStack, contextmanager
+
+#####################
+## Define LockStripes class
+##### A fixed pool of re-entrant locks shared out by key hash, so operations
+##### on different keys usually take different locks without allocating one
+##### lock per book or member.
+class LockStripes:
+    def __init__(self, count=64):
+        self._locks = [threading.RLock() for _ in range(count)]
+
+    def __iter__(self):
+        return iter(self._locks)
+
+    def lock_for(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+
+@contextmanager
+def hold_all(*groups):
+    # Acquire every lock in the given groups, in order. Callers must list
+    # groups in the global lock order so this never deadlocks with
+    # operations that take single stripes.
+    with ExitStack() as stack:
+        for group in groups:
+            for lock in group:
+                stack.enter_context(lock)
+        yield
@@ -1,7 +1,12 @@
 # main.py
 
-from libraryClasses import Book, Member, BorrowRecord, Library
+import sys
+from datetime import date
+
+from libraryClasses import Book, Member, BorrowRecord, Library, Page
 from validation import get_valid_input
+from instrumentation import METRICS
+from history import to_ordinal
 
 def pause():
     input("\nPress Enter to continue...")
@@ -17,12 +22,90 @@ def menu():
     print("7. List Members Who Borrowed")
     print("8. Most Popular Genre")
     print("9. Save & Exit")
+    print("10. Performance Stats")
+    print("11. Overdue Loans")
     print("==========================================")
     return input("Enter your choice: ").strip()
 
+PAGE_SIZE = 20
+
+def page_through(fetch, show):
+    # Print results a page at a time: fetch(cursor) returns a Page, show()
+    # prints one item. Returns how many were shown.
+    cursor = None
+    shown = 0
+    while True:
+        page = fetch(cursor)
+        for item in page.items:
+            show(item)
+        shown += len(page.items)
+        if page.next_cursor is None:
+            return shown
+        if input(f"-- {shown} shown. Enter for more, q to stop: ").strip().lower() == "q":
+            return shown
+        cursor = page.next_cursor
+
+def list_pages(items):
+    # fetch() for page_through over an already built list
+    def fetch(cursor):
+        start = cursor or 0
+        end = start + PAGE_SIZE
+        return Page(items[start:end], end if end < len(items) else None)
+    return fetch
+
+def show_overdue(library):
+    today = date.today().isoformat()
+    print("\n--- Overdue Loans ---")
+    def show_loan(loan):
+        late = to_ordinal(today) - to_ordinal(loan.due_on)
+        print(f"{loan.member_id} | {loan.book_id} | due {loan.due_on} | "
+              f"{late} days late | fine so far {late * library.fine_per_day}")
+    if not page_through(list_pages(library.overdue_loans(today)), show_loan):
+        print("No overdue loans.")
+    print("\n--- Due In The Next 2 Days ---")
+    if not page_through(list_pages(library.loans_due_within(2, today)),
+                        lambda loan: print(f"{loan.member_id} | {loan.book_id} | due {loan.due_on}")):
+        print("No loans due soon.")
+
+def show_stats(library):
+    print("\n--- Performance Stats ---")
+    cache = library.cache_stats()
+    if cache is not None:
+        print(f"query cache: {cache['size']}/{cache['maxsize']} entries, {cache['hits']} hits, "
+              f"{cache['misses']} misses, {cache['evictions']} evictions, {cache['invalidations']} invalidations")
+    if not METRICS.enabled:
+        # Off by default so normal use pays no timing cost
+        if input("Timing is off. Turn it on now? (y/n): ").strip().lower() == "y":
+            library.enable_instrumentation()
+            print("Timing on; operations from now on are measured.")
+        return
+    stats = library.stats()
+    if stats["timers"]:
+        print(f"{'operation':<30}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, t in stats["timers"].items():
+            print(f"{name:<30}{t['count']:>7}{t['p50'] * 1000:>10.3f}{t['p95'] * 1000:>10.3f}{t['p99'] * 1000:>10.3f}")
+    else:
+        print("No operations timed yet.")
+    for name, value in stats["counters"].items():
+        print(f"{name}: {value}")
+    fmt = input("\nDump as (j = JSON, p = Prometheus, Enter = skip): ").strip().lower()
+    if fmt in ("j", "p"):
+        print(library.dump_stats("json" if fmt == "j" else "prometheus"))
+
 def main():
     datafile='/content/library_data.json' # For google colab environment
-    library = Library.load_from_json(datafile)
+    # Journal mode: each change is appended to <datafile>.journal as it happens;
+    # the full snapshot is rewritten in the background a few seconds after a
+    # burst of changes, and at Save & Exit.
+    # The file is streamed and borrow history is loaded on first use.
+    # Timing is opt-in: run with --stats, or turn it on from menu 10.
+    instrumented = "--stats" in sys.argv[1:]
+    if instrumented:
+        METRICS.enable()  # time the load too
+    library = Library.load_streaming(datafile, journal=True, lazy_history=True)
+    if instrumented:
+        library.enable_instrumentation()
+    library.enable_autosave(max_delay=5.0, max_pending=200)
 
     while True:
         choice = menu()
@@ -41,7 +124,6 @@ def main():
                 genre = get_valid_input("genre")
 
                 library.add_book(Book(book_id, title, author, genre))
-                library.save_to_json()
                 print("Book added successfully.")
             except ValueError as e:
                 print(f"Error: {e}")
@@ -60,7 +142,6 @@ def main():
                 contact = get_valid_input("contact")
 
                 library.add_member(Member(member_id, name, age, contact))
-                library.save_to_json()
                 print("Member added successfully.")
             except ValueError as e:
                 print(f"Error: {e}")
@@ -79,8 +160,7 @@ def main():
                 book_id = get_valid_input("book_id")
 
                 library.borrow_book(member_id, book_id)
-                library.save_to_json()
-                print("Book issued successfully.")
+                print(f"Book issued successfully. Due back on {library.due_date(date.today().isoformat())}.")
             except ValueError as e:
                 print(f"Error: {e}")
 
@@ -96,9 +176,10 @@ def main():
                 member_id = get_valid_input("member_id")
                 book_id = get_valid_input("book_id")
 
-                library.return_book(member_id, book_id)
-                library.save_to_json()
+                fine = library.return_book(member_id, book_id)
                 print("Book returned successfully.")
+                if fine:
+                    print(f"Returned late: fine due {fine}.")
             except ValueError as e:
                 print(f"Error: {e}")
 
@@ -112,17 +193,15 @@ def main():
             title = input("Search by title (or leave blank): ").strip()
             author = input("Search by author (or leave blank): ").strip()
 
-            results = library.search_books(
-                title if title else None,
-                author if author else None
-            )
+            def show_book(book):
+                status = "Available" if book.available else "Issued"
+                print(f"{book.book_id} | {book.title} | {book.author} | {status}")
 
-            if results:
-                print("\n--- Search Results ---")
-                for book in results:
-                    status = "Available" if book.available else "Issued"
-                    print(f"{book.book_id} | {book.title} | {book.author} | {status}")
-            else:
+            print("\n--- Search Results ---")
+            shown = page_through(
+                lambda cursor: library.search_books_page(title or None, author or None, PAGE_SIZE, cursor),
+                show_book)
+            if not shown:
                 print("No books found.")
 
             pause()
@@ -134,13 +213,11 @@ def main():
             print("\n--- Available Books by Genre ---")
             genre = input("Genre: ").strip()
 
-            results = library.get_available_books_by_genre(genre)
-
-            if results:
-                print(f"\nAvailable books in '{genre}':")
-                for book in results:
-                    print(f"{book.book_id} | {book.title} | {book.author}")
-            else:
+            print(f"\nAvailable books in '{genre}':")
+            shown = page_through(
+                lambda cursor: library.available_books_by_genre_page(genre, PAGE_SIZE, cursor),
+                lambda book: print(f"{book.book_id} | {book.title} | {book.author}"))
+            if not shown:
                 print("No available books in this genre.")
 
             pause()
@@ -150,12 +227,10 @@ def main():
         # ----------------------------------------
         elif choice == "7":
             print("\n--- Members With Borrowed Books ---")
-            members = library.list_members_with_borrows()
-
-            if members:
-                for m in members:
-                    print(f"{m.member_id} | {m.name} | Borrowed Count: {len(m.borrowed_books)}")
-            else:
+            shown = page_through(
+                lambda cursor: library.members_with_borrows_page(PAGE_SIZE, cursor),
+                lambda m: print(f"{m.member_id} | {m.name} | Borrowed Count: {m.borrowed_count()}"))
+            if not shown:
                 print("Currently, no members have borrowed books.")
 
             pause()
@@ -177,10 +252,25 @@ def main():
         # ----------------------------------------
         elif choice == "9":
             print("Saving data...")
-            library.save_to_json()
+            library.flush()
+            library.close()
             print("Goodbye!")
             break
 
+        # ----------------------------------------
+        # 10. Performance Stats
+        # ----------------------------------------
+        elif choice == "10":
+            show_stats(library)
+            pause()
+
+        # ----------------------------------------
+        # 11. Overdue Loans
+        # ----------------------------------------
+        elif choice == "11":
+            show_overdue(library)
+            pause()
+
         else:
             print("Invalid choice. Try again.")
             pause()
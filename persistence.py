@@ -0,0 +1,255 @@
+# persistence.py
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from instrumentation import METRICS
+
+#####################
+## Crash-safe file helpers
+##### atomic_write replaces a file in one step: the data goes to a temp file
+##### in the same directory, is fsync'd, and is then renamed over the target.
+##### Readers see either the old file or the new one, never a partial write.
+##### Each call gets its own temp file, so concurrent writers of one path
+##### cannot remove or truncate each other's.
+def fsync_dir(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    if not hasattr(os, "O_DIRECTORY"):
+        return  # Windows: directory handles cannot be fsync'd
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write(path, data, mode="w"):
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+            f.flush()
+            try:
+                # mkstemp creates the file 0600; keep the target's mode
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+            except FileNotFoundError:
+                os.chmod(tmp_path, 0o644)
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    fsync_dir(path)
+
+
+#####################
+## Define Journal class
+##### Append-only log of Library mutations, one compact JSON object per line.
+##### Every record carries a monotonically increasing "seq"; snapshots store
+##### the last seq they contain so replay can skip records already folded in.
+class Journal:
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.seq = 0
+        self.pending = 0  # records appended since the last compaction
+        self._file = None
+        self._lock = threading.RLock()       # guards the file and seq
+        self._sync_lock = threading.Lock()   # one fsync at a time
+        self._written_seq = 0                # last seq flushed to the OS
+        self._synced_seq = 0                 # last seq known to be on disk
+
+    def open(self):
+        if self._file is None:
+            self._file = open(self.path, "a")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, op, **data):
+        self.append_batch([(op, data)])
+
+    def append_batch(self, records):
+        # One write and one fsync for a list of (op, data) pairs
+        with self._lock:
+            self.open()
+            lines = []
+            for op, data in records:
+                self.seq += 1
+                lines.append(json.dumps({"seq": self.seq, "op": op, **data}, separators=(",", ":")) + "\n")
+            payload = "".join(lines)
+            self._file.write(payload)
+            self._file.flush()
+            METRICS.add("journal_bytes_written", len(payload))
+            self._written_seq = self.seq
+            self.pending += len(lines)
+            my_seq = self.seq
+        if self.fsync:
+            self._sync(my_seq)
+
+    def _sync(self, seq):
+        # Group commit: the fsync is done outside the write lock, and one
+        # fsync covers every record written before it started, so threads
+        # queued behind it usually find their record already durable
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            with self._lock:
+                if self._file is None:
+                    return  # closed since the write; close() flushed it
+                target = self._written_seq
+                fd = self._file.fileno()
+            with METRICS.timer("journal_fsync"):
+                os.fsync(fd)
+            self._synced_seq = target
+
+    def replay(self, after_seq=0):
+        """Yield journal records with seq > after_seq.
+
+        A torn final line (crash mid-append) is dropped and cut off the file so
+        later appends start on a clean line; corruption anywhere else raises.
+        """
+        self.seq = max(self.seq, after_seq)
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            good_offset = 0
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    if f.read(1):
+                        raise ValueError(f"Corrupt journal record at byte {good_offset} in {self.path}")
+                    self._truncate(good_offset)
+                    return
+                if not line.endswith(b"\n"):
+                    # Complete JSON but no newline: finish the line for the next append
+                    with open(self.path, "ab") as fix:
+                        fix.write(b"\n")
+                good_offset += len(line)
+                self.seq = max(self.seq, record["seq"])
+                if record["seq"] > after_seq:
+                    self.pending += 1
+                    yield record
+
+    def reset(self, keep_after=None):
+        # Called after a snapshot containing every record up to keep_after
+        # (default: all of them) has been written; later records are kept
+        with self._sync_lock, self._lock:
+            self.close()
+            kept = []
+            if keep_after is not None and keep_after < self.seq:
+                with open(self.path, "r") as f:
+                    kept = [line for line in f if line.strip() and json.loads(line)["seq"] > keep_after]
+            atomic_write(self.path, "".join(kept))
+            self.pending = len(kept)
+            # The rewrite is fsync'd, so every record written so far is durable
+            self._written_seq = self._synced_seq = self.seq
+
+    def _truncate(self, offset):
+        with open(self.path, "r+b") as f:
+            f.truncate(offset)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+#####################
+## Define SnapshotScheduler class
+##### Background writer for debounced snapshots. mark() is called once per
+##### change and only flips a flag; a worker thread calls save() once the
+##### oldest unsaved change is max_delay seconds old or max_pending changes
+##### have piled up, so a burst of changes costs one write. At most
+##### max_delay seconds (or max_pending changes) are lost on a crash.
+class SnapshotScheduler:
+    def __init__(self, save, max_delay=2.0, max_pending=100):
+        self.save = save
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.pending = 0            # changes since the last successful save
+        self.saves = 0
+        self.last_error = None      # exception from the last failed background save
+        self._first_change = None   # monotonic time of the oldest unsaved change
+        self._closed = False
+        self._cond = threading.Condition()
+        self._save_lock = threading.Lock()  # one save at a time (worker or flush)
+        self._worker = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._worker.start()
+
+    def mark(self):
+        with self._cond:
+            if self.pending == 0:
+                self._first_change = time.monotonic()
+            self.pending += 1
+            if self.pending == 1 or self.pending >= self.max_pending:
+                self._cond.notify()
+
+    def flush(self):
+        # Write now, in the caller's thread, if anything is unsaved; errors raise
+        with self._save_lock:
+            with self._cond:
+                pending, self.pending = self.pending, 0
+            if pending:
+                self._save(pending)
+
+    def close(self, flush=True):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+        if flush:
+            self.flush()
+
+    def _save(self, pending):
+        try:
+            self.save()
+        except BaseException:
+            with self._cond:
+                # Put the changes back so the next attempt covers them
+                if self.pending == 0:
+                    self._first_change = time.monotonic()
+                self.pending += pending
+            raise
+        self.saves += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    due = self._due_in()
+                    if due is not None and due <= 0:
+                        break
+                    self._cond.wait(due)  # None: sleep until the next mark()
+            with self._save_lock:
+                with self._cond:
+                    pending, self.pending = self.pending, 0
+                if not pending:
+                    continue  # a flush() got there first
+                try:
+                    self._save(pending)
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = e
+                    with self._cond:
+                        # Back off before retrying a failing disk
+                        self._first_change = time.monotonic()
+
+    def _due_in(self):
+        # Seconds until a save is due; None when nothing is pending
+        if self.pending == 0:
+            return None
+        if self.pending >= self.max_pending and self.last_error is None:
+            return 0  # after a failure, retry on the max_delay clock only
+        return self._first_change + self.max_delay - time.monotonic()
@@ -0,0 +1,117 @@
+# querycache.py
+
+import threading
+from collections import OrderedDict
+
+from instrumentation import METRICS
+
+#####################
+## Define QueryCache class
+##### Bounded LRU cache of catalog query results, keyed on normalized
+##### arguments:
+#####     ("search", title, author)   search_books (lower-cased substrings)
+#####     ("genre", genre)            get_available_books_by_genre
+##### The Library reports each catalog change and the cache drops only
+##### the entries that change can affect:
+#####   - a new book evicts its genre and the searches its title and author
+#####     match;
+#####   - a checkout or return evicts that book's genre. Searches return
+#####     every matching book whatever its availability, and the cached
+#####     Book objects are the live ones, so they stay valid.
+##### Every invalidation bumps an epoch. A result computed while one ran
+##### is not stored, so a slow query racing a write cannot put a stale
+##### list back.
+##### Hits, misses, capacity evictions and invalidations are counted here
+##### and mirrored into METRICS as query_cache_* counters.
+QUERY_CACHE_SIZE = 1024
+
+class QueryCache:
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0      # dropped to stay within maxsize
+        self.invalidations = 0  # dropped because the catalog changed
+        self._entries = OrderedDict()
+        self._searches = set()  # ("search", title, author) keys currently cached
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def search_key(title, author):
+        return ("search", (title or "").lower(), (author or "").lower())
+
+    @staticmethod
+    def genre_key(genre):
+        return ("genre", genre.lower())
+
+    def lookup(self, key):
+        # (hit, result, epoch); pass epoch back to store() on a miss
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            epoch = self._epoch
+        METRICS.add("query_cache_hits" if result is not None else "query_cache_misses")
+        return result is not None, result, epoch
+
+    def store(self, key, result, epoch):
+        evicted = 0
+        with self._lock:
+            if epoch != self._epoch:
+                return  # the catalog changed while the query ran
+            self._entries[key] = tuple(result)
+            self._entries.move_to_end(key)
+            if key[0] == "search":
+                self._searches.add(key)
+            while len(self._entries) > self.maxsize:
+                old, _ = self._entries.popitem(last=False)
+                self._searches.discard(old)
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            METRICS.add("query_cache_evictions", evicted)
+
+    # --------------------------------------------
+    # Invalidation
+    # --------------------------------------------
+    def book_added(self, book):
+        title, author = book.title.lower(), book.author.lower()
+        with self._lock:
+            self._epoch += 1
+            stale = [self.genre_key(book.genre)]
+            stale += [key for key in self._searches if key[1] in title and key[2] in author]
+            self._drop(stale)
+
+    def availability_changed(self, book):
+        with self._lock:
+            self._epoch += 1
+            self._drop([self.genre_key(book.genre)])
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._drop(list(self._entries))
+
+    def _drop(self, keys):
+        dropped = 0
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self._searches.discard(key)
+                dropped += 1
+        self.invalidations += dropped
+        if dropped:
+            METRICS.add("query_cache_invalidations", dropped)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits,
+                    "misses": self.misses, "hit_rate": self.hits / lookups if lookups else None,
+                    "evictions": self.evictions, "invalidations": self.invalidations}
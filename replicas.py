@@ -0,0 +1,152 @@
+# replicas.py
+
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from persistence import SnapshotScheduler, atomic_write
+from snapshot import read_snapshot, snapshot_bytes
+
+#####################
+## Define ReplicaPool class
+##### Read scaling past the GIL: the process that owns the Library stays the
+##### only writer, and a pool of worker processes answers read queries from
+##### a published copy of it. publish() writes a binary snapshot
+##### (snapshot.py) as gen-N.snap plus a small manifest, then bumps a
+##### generation number in shared memory. Before each task a worker
+##### compares that number with the copy it holds and, if it is stale,
+##### memory-maps the new snapshot and rebuilds its indexes.
+#####
+##### Writes mark the pool dirty (Library._log); a SnapshotScheduler
+##### republishes at most max_delay seconds or max_pending changes later, so a
+##### burst of writes costs one snapshot. Replica reads are therefore up to
+##### max_delay behind the writer; call sync() to publish immediately when
+##### a read must see the writes before it.
+MANIFEST = "manifest.json"
+KEEP_GENERATIONS = 2   # old snapshots kept for workers still opening them
+READ_QUERIES = (
+    "find_book_by_id", "find_member_by_id", "search_books", "search",
+    "get_available_books_by_genre", "genre_availability", "list_members_with_borrows",
+    "most_popular_genre", "top_genres", "top_authors", "top_books", "top_members",
+    "borrow_count", "history_for_member", "history_for_book", "history_between",
+    "search_books_page", "available_books_by_genre_page", "members_with_borrows_page",
+    "overdue_loans", "loans_due_within",
+)
+
+class ReplicaPool:
+    def __init__(self, library, workers=None, path=None, max_delay=0.5, max_pending=100):
+        self.library = library
+        self.workers = workers or os.cpu_count() or 1
+        self._own_dir = path is None
+        self.path = path or tempfile.mkdtemp(prefix="library-replicas-")
+        os.makedirs(self.path, exist_ok=True)
+        self.generation = 0
+        self._publish_lock = threading.Lock()
+
+        # Spawned, not forked: the writer runs threads (autosave, server
+        # workers) whose locks a fork could copy mid-operation
+        context = multiprocessing.get_context("spawn")
+        self._shared_generation = context.Value("q", 0, lock=False)
+        self.publish()
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                            initargs=(self.path, self._shared_generation))
+        self.scheduler = SnapshotScheduler(self.publish, max_delay, max_pending)
+
+    def mark(self):
+        self.scheduler.mark()
+
+    def sync(self):
+        # Publish pending changes now; replica reads submitted afterwards see them
+        self.scheduler.flush()
+
+    def publish(self):
+        with self._publish_lock:
+            generation = self.generation + 1
+            name = f"gen-{generation}.snap"
+            # Only the encoding needs a consistent Library; the write and
+            # its fsync happen after writers are let back in. The snapshot
+            # also carries the loan policy and the archive reference.
+            with self.library._exclusive():
+                data = snapshot_bytes(self.library)
+            atomic_write(os.path.join(self.path, name), data, mode="wb")
+            manifest = {"generation": generation, "snapshot": name, "datafile": self.library.datafile}
+            atomic_write(os.path.join(self.path, MANIFEST), json.dumps(manifest))
+            self.generation = generation
+            self._shared_generation.value = generation
+            stale = f"gen-{generation - KEEP_GENERATIONS}.snap"
+            try:
+                os.remove(os.path.join(self.path, stale))
+            except FileNotFoundError:
+                pass
+
+    # --------------------------------------------
+    # Queries
+    ##### query() / submit() run a Library read method on a replica;
+    ##### run() / submit_call() run any module-level function fn(library,
+    ##### *args) there, so callers can shape results in the worker instead
+    ##### of pickling whole Book / Member lists back. Results are copies
+    ##### as of the replica's generation.
+    # --------------------------------------------
+    def submit(self, method, *args, **kwargs):
+        if method not in READ_QUERIES:
+            raise ValueError(f"Not a read query: {method}")
+        return self.executor.submit(_call_method, method, args, kwargs)
+
+    def query(self, method, *args, **kwargs):
+        return self.submit(method, *args, **kwargs).result()
+
+    def submit_call(self, fn, *args, **kwargs):
+        return self.executor.submit(_call_function, fn, args, kwargs)
+
+    def run(self, fn, *args, **kwargs):
+        return self.submit_call(fn, *args, **kwargs).result()
+
+    def close(self):
+        self.scheduler.close(flush=False)
+        self.executor.shutdown(wait=True)
+        if self._own_dir:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+#####################
+## Worker side
+##### One replica Library per worker process, reloaded when the shared
+##### generation moves past the one it was built from.
+_replica = None
+_replica_generation = 0
+_replica_dir = None
+_shared = None
+
+def _init_worker(path, shared_generation):
+    global _replica_dir, _shared
+    _replica_dir = path
+    _shared = shared_generation
+    _current_replica()
+
+def _current_replica():
+    global _replica, _replica_generation
+    if _replica is not None and _shared.value == _replica_generation:
+        return _replica
+    for _ in range(10):
+        with open(os.path.join(_replica_dir, MANIFEST), "r") as f:
+            manifest = json.load(f)
+        try:
+            library = read_snapshot(os.path.join(_replica_dir, manifest["snapshot"]), manifest["datafile"])
+        except FileNotFoundError:
+            # Superseded and removed between reading the manifest and opening it
+            time.sleep(0.01)
+            continue
+        _replica, _replica_generation = library, manifest["generation"]
+        return _replica
+    raise RuntimeError("Could not open a published replica snapshot.")
+
+def _call_method(method, args, kwargs):
+    return getattr(_current_replica(), method)(*args, **kwargs)
+
+def _call_function(fn, args, kwargs):
+    return fn(_current_replica(), *args, **kwargs)
@@ -0,0 +1,268 @@
+# reports.py
+
+import multiprocessing
+import os
+import sys
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from operator import sub
+
+from archive import read_partition
+from history import from_ordinal, to_ordinal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#####################
+## Define ReportEngine class
+##### Circulation analytics over the whole borrow history (in memory plus
+##### any archive partitions): monthly circulation, per-genre trends and
+##### totals, average loan duration and overdue counts.
+#####
+##### The history is cut into partitions (CHUNK_ROWS slices of the
+##### columns, one per archive month file) and each partition is reduced
+##### to two small counters:
+#####     borrows[(genre, borrowed_day)]          -> loans
+#####     lengths[(genre, returned - borrowed)]   -> loans
+##### with genre = -1 for books no longer in the catalog. Open loans have
+##### returned_day 0, so their "length" is -borrowed_day (always negative)
+##### and still tells when they went out. Every report is derived from
+##### the merged counters, so partials are tiny whatever the row count.
+#####
+##### Partitions are counted in a process pool once the history has
+##### PARALLEL_MIN_ROWS rows, inline below that. With NumPy installed each
+##### partition is counted with vectorized unique(); without it the
+##### counting runs in C via Counter(zip(...)), still without a per-row
+##### Python loop.
+CHUNK_ROWS = 1_000_000
+PARALLEL_MIN_ROWS = 2_000_000
+NO_GENRE = -1
+
+class ReportEngine:
+    def __init__(self, library, workers=None, chunk_rows=CHUNK_ROWS, use_numpy=None):
+        self.library = library
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_rows = chunk_rows
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        if self.use_numpy and np is None:
+            raise ValueError("NumPy is not installed.")
+
+    # --------------------------------------------
+    # Reports
+    # --------------------------------------------
+    def monthly_circulation(self, start=None, end=None):
+        # {"YYYY-MM": loans} by month borrowed; start/end are inclusive months
+        months = {}
+        month_of = _MonthCache()
+        for (genre, day), n in self._counters(lengths=False)[0].items():
+            month = month_of[day]
+            months[month] = months.get(month, 0) + n
+        return _month_range(months, start, end)
+
+    def genre_trends(self, start=None, end=None):
+        # {genre: {"YYYY-MM": loans}} for books in the catalog
+        borrows, _, genres = self._counters(lengths=False)
+        trends = {}
+        month_of = _MonthCache()
+        for (genre, day), n in borrows.items():
+            if genre != NO_GENRE:
+                months = trends.setdefault(genres[genre], {})
+                month = month_of[day]
+                months[month] = months.get(month, 0) + n
+        return {genre: _month_range(months, start, end) for genre, months in sorted(trends.items())}
+
+    def genre_counts(self):
+        # {genre: loans}, most borrowed first
+        borrows, _, genres = self._counters(lengths=False)
+        totals = Counter()
+        for (genre, day), n in borrows.items():
+            if genre != NO_GENRE:
+                totals[genres[genre]] += n
+        return dict(totals.most_common())
+
+    def average_loan_duration(self, by_genre=False):
+        # Mean days from borrow to return over returned loans (None if
+        # there are none); by_genre gives {genre: mean days}
+        _, lengths, genres = self._counters(borrows=False)
+        return _average_durations(lengths, genres, by_genre)
+
+    def overdue_counts(self, as_of=None, loan_days=None):
+        # Open loans older than loan_days (default the library's loan
+        # period) on as_of (ISO date, default today), and returned loans
+        # that were kept longer than loan_days
+        loan_days = self.library.loan_days if loan_days is None else loan_days
+        lengths = self._counters(borrows=False)[1]
+        return _overdue(lengths, to_ordinal(as_of) or date.today().toordinal(), loan_days)
+
+    def summary(self, as_of=None, loan_days=None):
+        # Every report from a single pass over the history
+        loan_days = self.library.loan_days if loan_days is None else loan_days
+        borrows, lengths, genres = self._counters()
+        months, trends, totals = {}, {}, Counter()
+        month_of = _MonthCache()
+        for (genre, day), n in borrows.items():
+            month = month_of[day]
+            months[month] = months.get(month, 0) + n
+            if genre != NO_GENRE:
+                by_month = trends.setdefault(genres[genre], {})
+                by_month[month] = by_month.get(month, 0) + n
+                totals[genres[genre]] += n
+        return {
+            "loans": sum(borrows.values()),
+            "monthly_circulation": dict(sorted(months.items())),
+            "genre_counts": dict(totals.most_common()),
+            "genre_trends": {genre: dict(sorted(m.items())) for genre, m in sorted(trends.items())},
+            "average_loan_duration": _average_durations(lengths, genres, False),
+            "average_loan_duration_by_genre": _average_durations(lengths, genres, True),
+            "overdue": _overdue(lengths, to_ordinal(as_of) or date.today().toordinal(), loan_days),
+        }
+
+    # --------------------------------------------
+    # Partition and merge
+    # --------------------------------------------
+    def _counters(self, borrows=True, lengths=True):
+        # (merged borrows, merged lengths, genre names by code)
+        context, tasks, rows, genres = self._partitions()
+        merged_borrows, merged_lengths = Counter(), Counter()
+        if rows < PARALLEL_MIN_ROWS or self.workers == 1 or len(tasks) == 1:
+            _init_context(context)
+            for task in tasks:
+                b, l = _count_partition(task, borrows, lengths)
+                merged_borrows.update(b)
+                merged_lengths.update(l)
+            return merged_borrows, merged_lengths, genres
+
+        # Spawned workers: the caller may be running Library threads
+        mp_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(min(self.workers, len(tasks)), mp_context=mp_context,
+                                 initializer=_init_context, initargs=(context,)) as pool:
+            n = len(tasks)
+            for b, l in pool.map(_count_partition, tasks, [borrows] * n, [lengths] * n):
+                merged_borrows.update(b)
+                merged_lengths.update(l)
+        return merged_borrows, merged_lengths, genres
+
+    def _partitions(self):
+        # (worker context, tasks, total rows, genres). Copies the columns under the
+        # library locks so writers can carry on while the report runs.
+        library = self.library
+        library._ensure_history()
+        with library._catalog_lock, library._history_lock:
+            history = library._borrow_history
+            genres = sorted({b.genre for b in library.books})
+            genre_code = {genre: i for i, genre in enumerate(genres)}
+            genre_by_id = {b.book_id: genre_code[b.genre] for b in library.books}
+            genre_of = array("i", [genre_by_id.get(book_id, NO_GENRE) for book_id in history.book_table.ids])
+            columns = (history.book_codes[:], history.borrowed_days[:], history.returned_days[:])
+            archive = library.archive
+            partition_paths = archive.partition_paths() if archive is not None else []
+            rows = len(history) + (len(archive) if archive is not None else 0)
+
+        tasks = [("files", path) for path in partition_paths]
+        for start in range(0, len(columns[0]), self.chunk_rows):
+            tasks.append(("columns",) + tuple(c[start:start + self.chunk_rows] for c in columns))
+        context = {"genre_of": genre_of, "genre_by_id": genre_by_id, "numpy": self.use_numpy}
+        return context, tasks, rows, genres
+
+
+#####################
+## Partition counting (runs in the pool workers, or inline)
+_context = None
+
+def _init_context(context):
+    global _context
+    _context = context
+
+def _count_partition(task, borrows=True, lengths=True):
+    if task[0] == "files":
+        rows = read_partition(task[1])
+        genre_by_id = _context["genre_by_id"]
+        ordinals = {}
+        for row in rows:
+            for day in row[2:]:
+                if day not in ordinals:
+                    ordinals[day] = to_ordinal(day)
+        genres = array("i", [genre_by_id.get(row[1], NO_GENRE) for row in rows])
+        borrowed = array("i", [ordinals[row[2]] for row in rows])
+        returned = array("i", [ordinals[row[3]] for row in rows])
+    else:
+        _, book_codes, borrowed, returned = task
+        genre_of = _context["genre_of"]
+        if _context["numpy"]:
+            genres = np.frombuffer(genre_of, dtype=np.int32)[np.frombuffer(book_codes, dtype=np.uint32)]
+        else:
+            genres = array("i", map(genre_of.__getitem__, book_codes))
+    if _context["numpy"]:
+        return _count_numpy(genres, borrowed, returned, borrows, lengths)
+    return (Counter(zip(genres, borrowed)) if borrows else Counter(),
+            Counter(zip(genres, map(sub, returned, borrowed))) if lengths else Counter())
+
+def _count_numpy(genres, borrowed, returned, borrows, lengths):
+    genres = np.asarray(genres, dtype=np.int64) + 1  # NO_GENRE -> 0
+    borrowed = np.frombuffer(borrowed, dtype=np.int32).astype(np.int64)
+    result = []
+    for wanted, values in ((borrows, lambda: borrowed),
+                           (lengths, lambda: np.frombuffer(returned, dtype=np.int32) - borrowed)):
+        if not wanted:
+            result.append(Counter())
+            continue
+        # One int64 key per row: genre in the high half, value (offset to
+        # be non-negative) in the low half
+        keys, counts = np.unique((genres << 32) | (values() + (1 << 31)), return_counts=True)
+        pairs = zip(((keys >> 32) - 1).tolist(), ((keys & 0xFFFFFFFF) - (1 << 31)).tolist())
+        result.append(Counter(dict(zip(pairs, counts.tolist()))))
+    return tuple(result)
+
+
+#####################
+## Report helpers
+class _MonthCache(dict):
+    # day ordinal -> "YYYY-MM", computed once per distinct day
+    def __missing__(self, day):
+        month = self[day] = from_ordinal(day)[:7]
+        return month
+
+def _month_range(months, start=None, end=None):
+    first, last = start or "", end or "9999-12"
+    return {month: n for month, n in sorted(months.items()) if first <= month <= last}
+
+def _average_durations(lengths, genres, by_genre):
+    totals = {}
+    for (genre, days), n in lengths.items():
+        if days < 0 or (by_genre and genre == NO_GENRE):
+            continue  # open loan, or a book no longer in the catalog
+        key = genres[genre] if by_genre else None
+        total = totals.setdefault(key, [0, 0])
+        total[0] += days * n
+        total[1] += n
+    if by_genre:
+        return {genre: total / n for genre, (total, n) in sorted(totals.items())}
+    total, n = totals.get(None, (0, 0))
+    return total / n if n else None
+
+def _overdue(lengths, as_of_day, loan_days):
+    open_overdue = returned_late = 0
+    for (genre, days), n in lengths.items():
+        if days < 0:
+            if as_of_day + days > loan_days:  # days == -borrowed_day
+                open_overdue += n
+        elif days > loan_days:
+            returned_late += n
+    return {"open_overdue": open_overdue, "returned_late": returned_late, "loan_days": loan_days}
+
+
+if __name__ == "__main__":
+    import json
+
+    from libraryClasses import Library
+
+    if len(sys.argv) < 2:
+        print("Usage: python reports.py <library_data.json> [workers]")
+        sys.exit(1)
+    library = Library.load_streaming(sys.argv[1])
+    engine = ReportEngine(library, int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print(json.dumps(engine.summary(), indent=2))
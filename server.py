@@ -0,0 +1,332 @@
+# server.py
+#
+# asyncio front end for Library: newline-delimited JSON over TCP, so many
+# desks and kiosks can share one Library in one process. Start it with
+#     python server.py [library_data.json] [port]
+#
+# Each request is one line:   {"id": 1, "op": "borrow_book", "args": {"member_id": "M001", "book_id": "B101"}}
+# and gets one reply line:    {"id": 1, "ok": true, "result": null}
+#                        or:  {"id": 1, "ok": false, "error": "Book is already borrowed."}
+# Requests on one connection are answered in order. Lookups by ID run on the
+# event loop (they are lock-free dict reads); anything that takes a Library
+# lock (searches and genre queries wait while a snapshot is serialized),
+# writes the journal, storage or snapshot, or may load the lazy history,
+# runs in a worker thread so neither fsync nor a save stalls other clients.
+#
+# With read replicas (python server.py [library_data.json] [port] [replicas])
+# the searches and reports in REPLICA_OPERATIONS run in worker processes
+# on a snapshot republished shortly after each burst of writes (see
+# replicas.py), so they can use every core; writes stay in this process.
+
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from bulkimport import parse_bool, parse_int
+from libraryClasses import Book, Member, Library
+from validation import BOOK_VALIDATOR, MEMBER_VALIDATOR
+
+DEFAULT_PORT = 8765
+MAX_LINE = 1 << 20  # longest accepted request line, in bytes
+BACKLOG = 1024      # pending connections, for bursts of clients
+
+
+#####################
+## Result encoding
+def _book(book):
+    return book.to_dict()
+
+def _member(member):
+    return member.to_dict()
+
+def _ranked(pairs, encode):
+    return [[encode(item) if item is not None else None, count] for item, count in pairs]
+
+
+#####################
+## Operations
+##### name -> (handler(library, **args) -> JSON-ready result, blocking)
+##### Blocking handlers are sent to the worker pool.
+def _validate(validator, record):
+    # Same field rules as the interactive prompts and bulk imports
+    errors = validator.validate(record)
+    if errors:
+        raise ValueError(" ".join(e.message for e in errors))
+
+def _add_book(library, book_id, title, author, genre, available=True):
+    _validate(BOOK_VALIDATOR, {"book_id": book_id, "title": title, "author": author, "genre": genre})
+    library.add_book(Book(book_id.strip(), title.strip(), author.strip(), genre.strip(), parse_bool(available)))
+
+def _add_member(library, member_id, name, age, contact):
+    _validate(MEMBER_VALIDATOR, {"member_id": member_id, "name": name, "age": age, "contact": contact})
+    library.add_member(Member(member_id.strip(), name.strip(), parse_int(age, "age"), str(contact).strip()))
+
+def _borrow_book(library, member_id, book_id):
+    library.borrow_book(member_id, book_id)
+
+def _return_book(library, member_id, book_id):
+    return library.return_book(member_id, book_id)
+
+def _borrow_many(library, pairs):
+    return library.borrow_many([tuple(pair) for pair in pairs])
+
+def _return_many(library, pairs):
+    return library.return_many([tuple(pair) for pair in pairs])
+
+def _find_book(library, book_id):
+    book = library.find_book_by_id(book_id)
+    return _book(book) if book else None
+
+def _find_member(library, member_id):
+    member = library.find_member_by_id(member_id)
+    return _member(member) if member else None
+
+def _search_books(library, title=None, author=None):
+    return [_book(b) for b in library.search_books(title, author)]
+
+def _search(library, query, limit=20):
+    return [_book(b) for b in library.search(query, limit)]
+
+def _available_by_genre(library, genre):
+    return [_book(b) for b in library.get_available_books_by_genre(genre)]
+
+def _genre_availability(library, genre=None):
+    return library.genre_availability(genre)
+
+def _members_with_borrows(library):
+    return [_member(m) for m in library.list_members_with_borrows()]
+
+def _page(page, encode):
+    return {"items": [encode(item) for item in page.items], "next_cursor": page.next_cursor}
+
+def _search_books_page(library, title=None, author=None, limit=20, cursor=None):
+    return _page(library.search_books_page(title, author, limit, cursor), _book)
+
+def _available_by_genre_page(library, genre, limit=20, cursor=None):
+    return _page(library.available_books_by_genre_page(genre, limit, cursor), _book)
+
+def _members_with_borrows_page(library, limit=20, cursor=None):
+    return _page(library.members_with_borrows_page(limit, cursor), _member)
+
+def _most_popular_genre(library):
+    return library.most_popular_genre()
+
+def _top_genres(library, n=10):
+    return _ranked(library.top_genres(n), str)
+
+def _top_authors(library, n=10):
+    return _ranked(library.top_authors(n), str)
+
+def _top_books(library, n=10):
+    return _ranked(library.top_books(n), _book)
+
+def _top_members(library, n=10):
+    return _ranked(library.top_members(n), _member)
+
+def _borrow_count(library, book_id):
+    return library.borrow_count(book_id)
+
+def _overdue_loans(library, as_of=None):
+    return [loan._asdict() for loan in library.overdue_loans(as_of)]
+
+def _loans_due_within(library, days, as_of=None):
+    return [loan._asdict() for loan in library.loans_due_within(days, as_of)]
+
+def _save(library):
+    library.save()
+
+OPERATIONS = {
+    "add_book": (_add_book, True),
+    "add_member": (_add_member, True),
+    "borrow_book": (_borrow_book, True),
+    "return_book": (_return_book, True),
+    "borrow_many": (_borrow_many, True),
+    "return_many": (_return_many, True),
+    "find_book": (_find_book, False),
+    "find_member": (_find_member, False),
+    "search_books": (_search_books, True),
+    "search": (_search, True),
+    "get_available_books_by_genre": (_available_by_genre, True),
+    "genre_availability": (_genre_availability, True),
+    "list_members_with_borrows": (_members_with_borrows, True),
+    "search_books_page": (_search_books_page, True),
+    "get_available_books_by_genre_page": (_available_by_genre_page, True),
+    "list_members_with_borrows_page": (_members_with_borrows_page, False),
+    "most_popular_genre": (_most_popular_genre, True),
+    "top_genres": (_top_genres, True),
+    "top_authors": (_top_authors, True),
+    "top_books": (_top_books, True),
+    "top_members": (_top_members, True),
+    "borrow_count": (_borrow_count, True),
+    "overdue_loans": (_overdue_loans, True),
+    "loans_due_within": (_loans_due_within, True),
+    "save": (_save, True),
+}
+
+## Read-only operations a ReplicaPool can answer. The worker sends back
+## the result already JSON-encoded (a str unpickles for free, where a list
+## of thousands of dicts does not), and the reply is spliced around it.
+REPLICA_OPERATIONS = {
+    "find_book", "find_member", "search_books", "search", "get_available_books_by_genre",
+    "genre_availability", "list_members_with_borrows", "most_popular_genre", "top_genres",
+    "top_authors", "top_books", "top_members", "borrow_count", "search_books_page",
+    "get_available_books_by_genre_page", "list_members_with_borrows_page", "overdue_loans",
+    "loans_due_within",
+}
+
+class EncodedResult(str):
+    pass
+
+def encoded_result(library, handler, *args, **kwargs):
+    return EncodedResult(json.dumps(handler(library, *args, **kwargs), separators=(",", ":")))
+
+def encode_reply(reply):
+    result = reply.get("result")
+    if isinstance(result, EncodedResult):
+        return (f'{{"id":{json.dumps(reply["id"])},"ok":true,"result":{result}}}\n').encode()
+    return json.dumps(reply, separators=(",", ":")).encode() + b"\n"
+
+
+#####################
+## Define LibraryServer class
+class LibraryServer:
+    def __init__(self, library, host="127.0.0.1", port=DEFAULT_PORT, workers=32):
+        self.library = library
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="library")
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve_client, self.host, self.port,
+                                                  limit=MAX_LINE, backlog=BACKLOG)
+        self.port = self._server.sockets[0].getsockname()[1]  # resolves port 0
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self, save=True):
+        # Stop accepting, then persist off the loop and let the workers finish
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if save:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.library.save)
+        self.executor.shutdown(wait=True)
+
+    async def handle(self, request):
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object.")
+            op = request.get("op")
+            if op not in OPERATIONS:
+                raise ValueError(f"Unknown operation: {op}")
+            args = request.get("args") or {}
+            if not isinstance(args, dict):
+                raise ValueError("args must be a JSON object.")
+            handler, blocking = OPERATIONS[op]
+            if op in REPLICA_OPERATIONS and self.library.replicas is not None:
+                result = await asyncio.wrap_future(self.library.replicas.submit_call(encoded_result, handler, **args))
+            elif blocking:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.executor, lambda: handler(self.library, **args))
+            else:
+                result = handler(self.library, **args)
+        except (ValueError, TypeError) as e:
+            return {"id": request_id, "ok": False, "error": str(e)}
+        except Exception as e:
+            # e.g. an argument of the wrong type deep inside a handler; the
+            # client still gets its reply and the connection stays usable
+            return {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        return {"id": request_id, "ok": True, "result": result}
+
+    async def _serve_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line longer than MAX_LINE; the stream cannot resync
+                    writer.write(b'{"id":null,"ok":false,"error":"Request too large."}\n')
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    reply = {"id": None, "ok": False, "error": "Malformed JSON."}
+                else:
+                    reply = await self.handle(request)
+                writer.write(encode_reply(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+#####################
+## Define LibraryClient class
+##### Minimal async client: one connection, one request in flight.
+class LibraryClient:
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=DEFAULT_PORT):
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+        return cls(reader, writer)
+
+    async def call(self, op, **args):
+        # Returns the reply dict; raise_for_error is left to the caller
+        self._next_id += 1
+        message = {"id": self._next_id, "op": op, "args": args}
+        self._writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+        await self._writer.drain()
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection.")
+        return json.loads(line)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def run_server(datafile, port=DEFAULT_PORT, host="127.0.0.1", replicas=0):
+    loop = asyncio.get_running_loop()
+    library = await loop.run_in_executor(
+        None, lambda: Library.load_streaming(datafile, journal=True, lazy_history=True))
+    if replicas:
+        await loop.run_in_executor(None, library.enable_replicas, replicas)
+    server = await LibraryServer(library, host, port).start()
+    print(f"Serving {datafile} on {server.host}:{server.port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close(save=True)
+        if library.replicas is not None:
+            library.replicas.close()
+            library.replicas = None
+
+
+if __name__ == "__main__":
+    datafile = sys.argv[1] if len(sys.argv) > 1 else "library_data.json"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+    replicas = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    try:
+        asyncio.run(run_server(datafile, port, replicas=replicas))
+    except KeyboardInterrupt:
+        print("\nSaved and stopped.")
@@ -0,0 +1,383 @@
+# snapshot.py
+
+import json
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+
+from archive import HistoryArchive
+from history import BorrowHistory, InternTable, from_ordinal, to_ordinal
+from persistence import atomic_write
+
+#####################
+## Binary snapshot format (little endian, every section 8-byte aligned)
+#####
+##### header        magic, version, journal_seq, then (offset, count) for
+#####               each section below
+##### str_offsets   u64 * (count + 1): byte offsets into str_data
+##### str_data      UTF-8 strings, each followed by a NUL byte
+##### books         BOOK records in catalog order
+##### book_index    u32 record numbers sorted by book_id
+##### members       MEMBER records in registry order
+##### member_index  u32 record numbers sorted by member_id
+##### loans         LOAN records (active borrows), sliced per member
+##### history       HISTORY records in borrow order
+##### meta          UTF-8 JSON: loan_policy and the history_archive
+#####               reference, as in the JSON snapshot (version 2 on)
+#####
+##### Strings are referenced by their u32 index in the string table and
+##### dates are day ordinals (0 = none), as in history.BorrowHistory.
+MAGIC = b"LIBSNAP\0"
+VERSION = 2
+SECTIONS = ("str_offsets", "str_data", "books", "book_index",
+            "members", "member_index", "loans", "history", "meta")
+
+HEADER = struct.Struct("<8sHHIQ" + "QQ" * len(SECTIONS))
+HEADER_V1 = struct.Struct("<8sHHIQ" + "QQ" * (len(SECTIONS) - 1))  # no meta section
+BOOK = struct.Struct("<IIIIB3x")      # book_id, title, author, genre, available
+MEMBER = struct.Struct("<IIIiII")     # member_id, name, contact, age, loans start, loans count
+LOAN = struct.Struct("<Ii")           # book_id, borrowed_on
+HISTORY = struct.Struct("<IIii")      # member_id, book_id, borrowed_on, returned_on
+NO_AGE = -1
+
+
+class SnapshotError(ValueError):
+    """Raised for files that are not valid library snapshots."""
+    pass
+
+
+# --------------------------------------------
+# Writer
+# --------------------------------------------
+class _StringTable:
+    def __init__(self):
+        self.codes = {}
+
+    def code(self, value):
+        value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            if "\0" in value:
+                raise SnapshotError(f"NUL character not allowed in snapshot strings: {value!r}")
+            code = self.codes[value] = len(self.codes)
+        return code
+
+
+def _pad(buf):
+    buf.extend(b"\0" * (-len(buf) % 8))
+
+
+def write_snapshot(library, path):
+    atomic_write(path, snapshot_bytes(library), mode="wb")
+
+
+def snapshot_bytes(library):
+    # The whole snapshot file as bytes. Callers hold library._exclusive()
+    # while it runs and write the result after releasing it
+    strings = _StringTable()
+    sections = {}
+    body = bytearray()
+
+    def begin(name, count):
+        _pad(body)
+        sections[name] = (HEADER.size + len(body), count)
+
+    # Records first (they assign string codes), then the string table
+    books = bytearray()
+    for b in library.books:
+        books += BOOK.pack(strings.code(b.book_id), strings.code(b.title), strings.code(b.author),
+                           strings.code(b.genre), int(bool(b.available)))
+    book_index = array("I", sorted(range(len(library.books)), key=lambda i: library.books[i].book_id))
+
+    members = bytearray()
+    loans = bytearray()
+    n_loans = 0
+    for m in library.members:
+        borrowed = m.borrowed_books
+        age = NO_AGE if m.age is None else int(m.age)
+        members += MEMBER.pack(strings.code(m.member_id), strings.code(m.name), strings.code(m.contact),
+                               age, n_loans, len(borrowed))
+        for entry in borrowed:
+            loans += LOAN.pack(strings.code(entry["book_id"]), to_ordinal(entry["borrowed_on"]))
+        n_loans += len(borrowed)
+    member_index = array("I", sorted(range(len(library.members)), key=lambda i: library.members[i].member_id))
+
+    history = library.borrow_history
+    rows = bytearray()
+    if isinstance(history, BorrowHistory):
+        # Remap the intern codes once, then pack the columns
+        member_map = [strings.code(i) for i in history.member_table.ids]
+        book_map = [strings.code(i) for i in history.book_table.ids]
+        for m, b, out, back in zip(history.member_codes, history.book_codes,
+                                   history.borrowed_days, history.returned_days):
+            rows += HISTORY.pack(member_map[m], book_map[b], out, back)
+    else:
+        for r in history:
+            rows += HISTORY.pack(strings.code(r.member_id), strings.code(r.book_id),
+                                 to_ordinal(r.borrowed_on), to_ordinal(r.returned_on))
+
+    encoded = [s.encode("utf-8") + b"\0" for s in strings.codes]
+    offsets = array("Q", [0])
+    for e in encoded:
+        offsets.append(offsets[-1] + len(e))
+
+    begin("str_offsets", len(encoded))
+    body += offsets.tobytes()
+    begin("str_data", offsets[-1])
+    body += b"".join(encoded)
+    begin("books", len(library.books))
+    body += books
+    begin("book_index", len(book_index))
+    body += book_index.tobytes()
+    begin("members", len(library.members))
+    body += members
+    begin("member_index", len(member_index))
+    body += member_index.tobytes()
+    begin("loans", n_loans)
+    body += loans
+    begin("history", len(history))
+    body += rows
+    meta = {"loan_policy": library.loan_policy(), "history_archive": None}
+    if library.archive is not None:
+        meta["history_archive"] = library.archive.reference()
+    meta = json.dumps(meta).encode("utf-8")
+    begin("meta", len(meta))
+    body += meta
+    _pad(body)
+
+    journal_seq = library.journal.seq if library.journal is not None else library.journal_seq
+    fields = [value for name in SECTIONS for value in sections[name]]
+    header = HEADER.pack(MAGIC, VERSION, 0, 0, journal_seq, *fields)
+    return header + bytes(body)
+
+
+# --------------------------------------------
+# Reader
+# --------------------------------------------
+class SnapshotReader:
+    """Memory-mapped view of a snapshot file.
+
+    Lookups decode only the records and strings they touch: find_book and
+    find_member binary-search the sorted indexes, and the history helpers
+    compare integer string codes without decoding rows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotError(f"{path} is empty")
+        try:
+            self._read_header()
+        except SnapshotError:
+            self._mm.close()
+            self._file.close()
+            raise
+
+        self._view = memoryview(self._mm)
+        self._str_offsets = self._section("str_offsets", 8, extra=1).cast("Q")
+        self._book_index = self._section("book_index", 4).cast("I")
+        self._member_index = self._section("member_index", 4).cast("I")
+
+    def _read_header(self):
+        if len(self._mm) < HEADER_V1.size:
+            raise SnapshotError(f"{self.path} is too short to be a library snapshot")
+        magic, version = struct.unpack_from("<8sH", self._mm, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{self.path} is not a library snapshot")
+        if version not in (1, VERSION):
+            raise SnapshotError(f"Unsupported snapshot version {version} in {self.path}")
+        header = HEADER if version == VERSION else HEADER_V1
+        if len(self._mm) < header.size:
+            raise SnapshotError(f"{self.path} is too short to be a library snapshot")
+        _, _, _, _, self.journal_seq, *fields = header.unpack_from(self._mm, 0)
+        self._sections = {name: (fields[2 * i], fields[2 * i + 1]) for i, name in enumerate(SECTIONS[:len(fields) // 2])}
+
+    def _section(self, name, size, extra=0):
+        offset, count = self._sections[name]
+        return self._view[offset:offset + (count + extra) * size]
+
+    def close(self):
+        for view in (self._str_offsets, self._book_index, self._member_index, self._view):
+            view.release()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --------------------------------------------
+    # Strings and records
+    # --------------------------------------------
+    def string(self, code):
+        start = self._sections["str_data"][0]
+        begin, end = self._str_offsets[code], self._str_offsets[code + 1] - 1
+        return self._mm[start + begin:start + end].decode("utf-8")
+
+    @property
+    def book_count(self):
+        return self._sections["books"][1]
+
+    @property
+    def member_count(self):
+        return self._sections["members"][1]
+
+    @property
+    def history_count(self):
+        return self._sections["history"][1]
+
+    def book(self, i):
+        from libraryClasses import Book
+        book_id, title, author, genre, available = BOOK.unpack_from(self._mm, self._sections["books"][0] + i * BOOK.size)
+        return Book(self.string(book_id), self.string(title), self.string(author), self.string(genre), bool(available))
+
+    def member(self, i):
+        from libraryClasses import Member
+        member_id, name, contact, age, start, count = MEMBER.unpack_from(
+            self._mm, self._sections["members"][0] + i * MEMBER.size)
+        loans_offset = self._sections["loans"][0]
+        borrowed = []
+        for j in range(start, start + count):
+            book_id, day = LOAN.unpack_from(self._mm, loans_offset + j * LOAN.size)
+            borrowed.append({"book_id": self.string(book_id), "borrowed_on": from_ordinal(day)})
+        return Member(self.string(member_id), self.string(name), None if age == NO_AGE else age,
+                      self.string(contact), borrowed)
+
+    def _key_code(self, section, struct_, index, key):
+        # Binary search a sorted index for key; returns (record no, string code)
+        offset = self._sections[section][0]
+        code_at = lambda pos: struct_.unpack_from(self._mm, offset + index[pos] * struct_.size)[0]
+        keys = _LazyKeys(len(index), lambda pos: self.string(code_at(pos)))
+        pos = bisect_left(keys, key)
+        if pos < len(index) and keys[pos] == key:
+            return index[pos], code_at(pos)
+        return None, None
+
+    def find_book(self, book_id):
+        record, _ = self._key_code("books", BOOK, self._book_index, book_id)
+        return None if record is None else self.book(record)
+
+    def find_member(self, member_id):
+        record, _ = self._key_code("members", MEMBER, self._member_index, member_id)
+        return None if record is None else self.member(record)
+
+    # --------------------------------------------
+    # History scans
+    # --------------------------------------------
+    def iter_history(self):
+        # (member_id code, book_id code, borrowed_on ordinal, returned_on ordinal)
+        offset, count = self._sections["history"]
+        return HISTORY.iter_unpack(self._view[offset:offset + count * HISTORY.size])
+
+    def _history_matching(self, field, code):
+        if code is None:
+            return []
+        return [
+            {"member_id": self.string(m), "book_id": self.string(b),
+             "borrowed_on": from_ordinal(out), "returned_on": from_ordinal(back)}
+            for m, b, out, back in self.iter_history() if (m, b)[field] == code
+        ]
+
+    def history_for_book(self, book_id):
+        _, code = self._key_code("books", BOOK, self._book_index, book_id)
+        return self._history_matching(1, code)
+
+    def history_for_member(self, member_id):
+        _, code = self._key_code("members", MEMBER, self._member_index, member_id)
+        return self._history_matching(0, code)
+
+    @property
+    def meta(self):
+        # loan_policy / history_archive; empty for version 1 files
+        if "meta" not in self._sections:
+            return {}
+        return json.loads(bytes(self._section("meta", 1)).decode("utf-8"))
+
+    # --------------------------------------------
+    # Full load
+    # --------------------------------------------
+    def to_library(self, datafile=None):
+        from libraryClasses import Book, Member, Library
+
+        offset, size = self._sections["str_data"]
+        strings = self._mm[offset:offset + size].decode("utf-8").split("\0")[:-1]
+
+        books = [
+            Book(strings[i], strings[t], strings[a], strings[g], bool(av))
+            for i, t, a, g, av in BOOK.iter_unpack(self._section("books", BOOK.size))
+        ]
+        loans = [(strings[b], from_ordinal(d)) for b, d in LOAN.iter_unpack(self._section("loans", LOAN.size))]
+        members = [
+            Member(strings[i], strings[n], None if age == NO_AGE else age, strings[c],
+                   [{"book_id": b, "borrowed_on": d} for b, d in loans[start:start + count]])
+            for i, n, c, age, start, count in MEMBER.iter_unpack(self._section("members", MEMBER.size))
+        ]
+
+        # Split the fixed-width history rows into columns with strided slices
+        columns = array("i")
+        columns.frombytes(self._section("history", HISTORY.size))
+        table = InternTable.from_ids(strings)
+        history = BorrowHistory.from_columns(
+            table, table,
+            array("I", columns[0::4].tobytes()), array("I", columns[1::4].tobytes()),
+            columns[2::4], columns[3::4])
+
+        library = Library(books, members, history, datafile)
+        library.journal_seq = self.journal_seq
+        meta = self.meta
+        library._set_loan_policy(meta.get("loan_policy"))
+        if meta.get("history_archive"):
+            library.attach_archive(HistoryArchive(**meta["history_archive"]))
+        return library
+
+
+class _LazyKeys:
+    # Sequence facade so bisect can search keys decoded on demand
+    def __init__(self, length, getter):
+        self._length = length
+        self._getter = getter
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, pos):
+        return self._getter(pos)
+
+
+# --------------------------------------------
+# Converters
+# --------------------------------------------
+def read_snapshot(path, datafile=None):
+    with SnapshotReader(path) as reader:
+        return reader.to_library(datafile)
+
+
+def json_to_snapshot(json_path, snapshot_path):
+    from libraryClasses import Library
+    write_snapshot(Library.load_streaming(json_path), snapshot_path)
+
+
+def snapshot_to_json(snapshot_path, json_path):
+    library = read_snapshot(snapshot_path, json_path)
+    library.save_to_json()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 4 or sys.argv[1] not in ("to-snapshot", "to-json"):
+        print("Usage: python snapshot.py to-snapshot <library_data.json> <library.snap>")
+        print("       python snapshot.py to-json <library.snap> <library_data.json>")
+        sys.exit(1)
+    if sys.argv[1] == "to-snapshot":
+        json_to_snapshot(sys.argv[2], sys.argv[3])
+    else:
+        snapshot_to_json(sys.argv[2], sys.argv[3])
+    print(f"Wrote {sys.argv[3]}")
@@ -0,0 +1,88 @@
+# sortedids.py
+
+from bisect import bisect_left, bisect_right
+
+#####################
+## Define SortedIds class
+##### Sorted set of ints stored as a list of short sorted buckets plus the
+##### largest id of each bucket. add() and discard() bisect the bucket
+##### maxima and then edit one bucket of at most BUCKET_SIZE ids, so an
+##### update costs O(log n) plus a bounded shift however large the set
+##### grows (one flat sorted list shifts O(n) ids per insert or delete).
+##### after(cursor, limit) bisects to the cursor and slices the next ids in
+##### order. Ids added in increasing order, as new books are, append.
+BUCKET_SIZE = 512
+
+class SortedIds:
+    def __init__(self):
+        self._buckets = []
+        self._maxes = []
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for bucket in self._buckets:
+            yield from bucket
+
+    def add(self, value):
+        buckets, maxes = self._buckets, self._maxes
+        i = bisect_left(maxes, value)
+        if i == len(maxes):
+            if not buckets:
+                buckets.append([])
+                maxes.append(value)
+            i -= 1
+            bucket = buckets[i]
+            bucket.append(value)
+            maxes[i] = value
+        else:
+            bucket = buckets[i]
+            j = bisect_left(bucket, value)
+            if j < len(bucket) and bucket[j] == value:
+                return
+            bucket.insert(j, value)
+        self._len += 1
+        if len(bucket) > BUCKET_SIZE:
+            half = len(bucket) // 2
+            buckets.insert(i + 1, bucket[half:])
+            maxes.insert(i + 1, maxes[i])
+            del bucket[half:]
+            maxes[i] = bucket[-1]
+
+    def discard(self, value):
+        buckets, maxes = self._buckets, self._maxes
+        i = bisect_left(maxes, value)
+        if i == len(maxes):
+            return
+        bucket = buckets[i]
+        j = bisect_left(bucket, value)
+        if j == len(bucket) or bucket[j] != value:
+            return
+        del bucket[j]
+        self._len -= 1
+        if not bucket:
+            del buckets[i]
+            del maxes[i]
+            return
+        maxes[i] = bucket[-1]
+        if i + 1 < len(buckets) and len(bucket) + len(buckets[i + 1]) <= BUCKET_SIZE // 2:
+            # Fold small neighbours together so the bucket count tracks n
+            bucket.extend(buckets.pop(i + 1))
+            maxes[i] = maxes.pop(i + 1)
+
+    def after(self, cursor, limit):
+        # Up to limit ids greater than cursor, in order
+        buckets = self._buckets
+        i = bisect_right(self._maxes, cursor)
+        if i == len(buckets):
+            return []
+        bucket = buckets[i]
+        start = bisect_right(bucket, cursor)
+        result = bucket[start:start + limit]
+        i += 1
+        while len(result) < limit and i < len(buckets):
+            result += buckets[i][:limit - len(result)]
+            i += 1
+        return result
@@ -0,0 +1,498 @@
+# storage.py
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+from persistence import atomic_write
+
+#####################
+## Define Storage interface
+##### A backend persists Library state. load() returns the snapshot dict
+##### understood by Library.from_dict, save() writes a full snapshot, and
+##### record() receives every mutation as it happens (the same op/data pairs
+##### that go to the journal) so write-through backends can persist one row
+##### at a time. Backends that set supports_queries also answer the catalog
+##### queries themselves; they return IDs which Library maps to its objects.
+##### Backends that set lazy_history leave borrow_history out of load() and
+##### yield its rows from load_history() when the Library first needs them.
+class Storage:
+    supports_queries = False
+    lazy_history = False  # True: history comes later from load_history()
+
+    def load(self):
+        raise NotImplementedError
+
+    def save(self, library):
+        raise NotImplementedError
+
+    def record(self, op, **data):
+        pass  # snapshot-only backends persist on save()
+
+    def record_batch(self, records):
+        # records: list of (op, data); backends may apply them in one go
+        for op, data in records:
+            self.record(op, **data)
+
+    def load_history(self):
+        return iter(())
+
+    def close(self):
+        pass
+
+
+#####################
+## Define JsonStorage class
+##### The original library_data.json format behind the Storage interface
+class JsonStorage(Storage):
+    def __init__(self, path="library_data.json"):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, library):
+        atomic_write(self.path, json.dumps(library.to_dict(), indent=4))
+
+
+#####################
+## Define SqliteStorage class
+##### Write-through SQLite backend: each mutation is one small transaction.
+##### Member.borrowed_books is not stored; it is rebuilt from open loans
+##### (rows with returned_on IS NULL) on load. The meta table holds the
+##### loan policy, written by save().
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    book_id   TEXT PRIMARY KEY,
+    title     TEXT NOT NULL,
+    author    TEXT NOT NULL,
+    genre     TEXT NOT NULL,
+    genre_key TEXT NOT NULL,
+    available INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS members (
+    member_id TEXT PRIMARY KEY,
+    name      TEXT NOT NULL,
+    age       INTEGER,
+    contact   TEXT
+);
+CREATE TABLE IF NOT EXISTS borrow_history (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    member_id   TEXT NOT NULL,
+    book_id     TEXT NOT NULL,
+    borrowed_on TEXT NOT NULL,
+    returned_on TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_books_genre ON books (genre_key, available);
+CREATE INDEX IF NOT EXISTS idx_history_book ON borrow_history (book_id);
+CREATE INDEX IF NOT EXISTS idx_history_member ON borrow_history (member_id);
+CREATE INDEX IF NOT EXISTS idx_history_open ON borrow_history (member_id, book_id)
+    WHERE returned_on IS NULL;
+"""
+
+HISTORY_CHUNK = 10_000  # rows per fetch while streaming borrow_history
+
+def _like_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+##### History is lazy: load() reads books, members and the open loans
+##### (through the partial idx_history_open index), and the full
+##### borrow_history table is streamed by load_history() on first use.
+##### The table is kept current by record(), so until then save() leaves
+##### it alone and rewrites only books and members.
+class SqliteStorage(Storage):
+    supports_queries = True
+    lazy_history = True
+
+    def __init__(self, path="library.db"):
+        self.path = path
+        self._history_pending = False  # load() ran, load_history() has not finished
+        # One connection shared by all threads, serialized by self._lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # --------------------------------------------
+    # Snapshot load/save
+    # --------------------------------------------
+    def load(self):
+        with self._lock:
+            return self._load()
+
+    def _load(self):
+        cur = self.conn.cursor()
+        books = [
+            {"book_id": r[0], "title": r[1], "author": r[2], "genre": r[3], "available": bool(r[4])}
+            for r in cur.execute("SELECT book_id, title, author, genre, available FROM books ORDER BY rowid")
+        ]
+        members = {}
+        for r in cur.execute("SELECT member_id, name, age, contact FROM members ORDER BY rowid"):
+            members[r[0]] = {"member_id": r[0], "name": r[1], "age": r[2], "contact": r[3], "borrowed_books": []}
+        for member_id, book_id, borrowed_on in cur.execute(
+                "SELECT member_id, book_id, borrowed_on FROM borrow_history WHERE returned_on IS NULL ORDER BY id"):
+            if member_id in members:
+                members[member_id]["borrowed_books"].append({"book_id": book_id, "borrowed_on": borrowed_on})
+        self._history_pending = True
+        data = {"books": books, "members": list(members.values())}
+        for key, value in cur.execute("SELECT key, value FROM meta"):
+            data[key] = json.loads(value)
+        return data
+
+    def load_history(self):
+        # History row dicts in insertion order, fetched in chunks on a
+        # cursor of their own
+        with self._lock:
+            cur = self.conn.execute(
+                "SELECT member_id, book_id, borrowed_on, returned_on FROM borrow_history ORDER BY id")
+            rows = cur.fetchmany(HISTORY_CHUNK)
+        while rows:
+            for member_id, book_id, borrowed_on, returned_on in rows:
+                yield {"member_id": member_id, "book_id": book_id,
+                       "borrowed_on": borrowed_on, "returned_on": returned_on}
+            with self._lock:
+                rows = cur.fetchmany(HISTORY_CHUNK)
+        self._history_pending = False
+
+    def save(self, library):
+        with self._lock, self.conn:
+            if not self._history_pending:
+                # Otherwise the table is already current and the Library
+                # has not loaded its history
+                self.conn.execute("DELETE FROM borrow_history")
+            self.conn.execute("DELETE FROM members")
+            self.conn.execute("DELETE FROM books")
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('loan_policy', ?)",
+                              (json.dumps(library.loan_policy()),))
+            self.conn.executemany(
+                "INSERT INTO books VALUES (?, ?, ?, ?, ?, ?)",
+                ((b.book_id, b.title, b.author, b.genre, b.genre.lower(), int(b.available)) for b in library.books))
+            self.conn.executemany(
+                "INSERT INTO members VALUES (?, ?, ?, ?)",
+                ((m.member_id, m.name, m.age, m.contact) for m in library.members))
+            if not self._history_pending:
+                self.conn.executemany(
+                    "INSERT INTO borrow_history (member_id, book_id, borrowed_on, returned_on) VALUES (?, ?, ?, ?)",
+                    ((r.member_id, r.book_id, r.borrowed_on, r.returned_on) for r in library.borrow_history))
+
+    # --------------------------------------------
+    # Write-through mutations
+    # --------------------------------------------
+    def record(self, op, **data):
+        with self._lock, self.conn:
+            self._apply(op, data)
+
+    def record_batch(self, records):
+        # A whole batch is one transaction
+        with self._lock, self.conn:
+            for op, data in records:
+                self._apply(op, data)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _apply(self, op, data):
+        if op == "add_book":
+            b = data["book"]
+            self.conn.execute(
+                "INSERT INTO books VALUES (?, ?, ?, ?, ?, ?)",
+                (b["book_id"], b["title"], b["author"], b["genre"], b["genre"].lower(), int(b["available"])))
+        elif op == "add_member":
+            m = data["member"]
+            self.conn.execute(
+                "INSERT INTO members VALUES (?, ?, ?, ?)",
+                (m["member_id"], m["name"], m["age"], m["contact"]))
+        elif op == "borrow":
+            self.conn.execute("UPDATE books SET available = 0 WHERE book_id = ?", (data["book_id"],))
+            self.conn.execute(
+                "INSERT INTO borrow_history (member_id, book_id, borrowed_on) VALUES (?, ?, ?)",
+                (data["member_id"], data["book_id"], data["on"]))
+        elif op == "return":
+            self.conn.execute("UPDATE books SET available = 1 WHERE book_id = ?", (data["book_id"],))
+            self.conn.execute(
+                "UPDATE borrow_history SET returned_on = ? "
+                "WHERE id = (SELECT MAX(id) FROM borrow_history "
+                "WHERE member_id = ? AND book_id = ? AND returned_on IS NULL)",
+                (data["on"], data["member_id"], data["book_id"]))
+        elif op == "import_loan":
+            if data["returned_on"] is None:
+                self.conn.execute("UPDATE books SET available = 0 WHERE book_id = ?", (data["book_id"],))
+            self.conn.execute(
+                "INSERT INTO borrow_history (member_id, book_id, borrowed_on, returned_on) VALUES (?, ?, ?, ?)",
+                (data["member_id"], data["book_id"], data["borrowed_on"], data["returned_on"]))
+        else:
+            raise ValueError(f"Unknown storage operation: {op}")
+
+    # --------------------------------------------
+    # Queries pushed down to SQL
+    # --------------------------------------------
+    def search_books(self, title=None, author=None):
+        sql = "SELECT book_id FROM books WHERE 1 = 1"
+        params = []
+        if title:
+            sql += " AND title LIKE ? ESCAPE '\\'"
+            params.append(_like_pattern(title))
+        if author:
+            sql += " AND author LIKE ? ESCAPE '\\'"
+            params.append(_like_pattern(author))
+        return [r[0] for r in self._query(sql + " ORDER BY rowid", params)]
+
+    def get_available_books_by_genre(self, genre):
+        return [r[0] for r in self._query(
+            "SELECT book_id FROM books WHERE genre_key = ? AND available = 1 ORDER BY rowid",
+            (genre.lower(),))]
+
+    def list_members_with_borrows(self):
+        return [r[0] for r in self._query(
+            "SELECT member_id FROM members m WHERE EXISTS ("
+            "SELECT 1 FROM borrow_history h WHERE h.member_id = m.member_id AND h.returned_on IS NULL"
+            ") ORDER BY m.rowid")]
+
+    def most_popular_genre(self):
+        rows = self._query(
+            "SELECT b.genre FROM borrow_history h JOIN books b ON b.book_id = h.book_id "
+            "GROUP BY b.genre ORDER BY COUNT(*) DESC, MIN(h.id) LIMIT 1")
+        return rows[0][0] if rows else None
+
+
+#####################
+## Define ShardedStorage class
+##### A directory of small JSON files instead of one library_data.json:
+##### books and members are split into `shards` files by crc32 of their ID,
+##### and borrow history into one file per month of borrowed_on. Mutations
+##### only mark the shards they touch dirty; save() rewrites just those.
+##### Books and members load on open, history months on first use of the
+##### history (Library resumes them through load_history()).
+#####
+##### Saves are copy-on-write: dirty shards are written as new files of the
+##### next generation, then manifest.json (shard -> file, journal_seq,
+##### loan_policy) is replaced atomically, then the superseded files are
+##### deleted. A crash at any point leaves the previous manifest and its
+##### files intact.
+class ShardedStorage(Storage):
+    lazy_history = True
+
+    def __init__(self, path="library_data", shards=16):
+        self.path = path
+        self.shards = shards
+        self.generation = 0
+        self.journal_seq = 0
+        self.loan_policy = None
+        self.files = {}          # shard key ("books/03", "history/2024-09") -> file name
+        self.dirty = set()       # shard keys to rewrite on the next save
+        self._lock = threading.Lock()
+        # kind -> {shard key: [id, ...]} and kind -> {id: catalog position}
+        self._ids = {"books": {}, "members": {}}
+        self._positions = {"books": {}, "members": {}}
+        self._open_months = {}   # (member_id, book_id) -> month of the open loan
+        self._month_rows = {}    # month -> [row index in Library.borrow_history]
+        self._history_rows = None  # rows assigned to months; None until history is loaded
+        os.makedirs(path, exist_ok=True)
+
+    def shard_of(self, kind, key):
+        return f"{kind}/{zlib.crc32(key.encode()) % self.shards:02d}"
+
+    # --------------------------------------------
+    # Loading
+    # --------------------------------------------
+    def load(self):
+        with self._lock:
+            try:
+                with open(os.path.join(self.path, MANIFEST), "r") as f:
+                    manifest = json.load(f)
+            except FileNotFoundError:
+                return {}
+            self.shards = manifest["shards"]
+            self.generation = manifest["generation"]
+            self.journal_seq = manifest["journal_seq"]
+            self.loan_policy = manifest.get("loan_policy")
+            self.files = manifest["files"]
+
+            books = self._load_catalog("books", "book_id")
+            members = self._load_catalog("members", "member_id")
+            for member in members:
+                for loan in member.get("borrowed_books", []):
+                    self._open_months[(member["member_id"], loan["book_id"])] = loan["borrowed_on"][:7]
+            return {"journal_seq": self.journal_seq, "loan_policy": self.loan_policy, "books": books,
+                    "members": members}
+
+    def _load_catalog(self, kind, id_field):
+        # Shard files hold [position, dict] pairs; merge them back into one
+        # list in catalog order
+        entries = []
+        for key, name in self.files.items():
+            if key.startswith(kind + "/"):
+                entries.extend(self._read(name))
+        entries.sort(key=lambda entry: entry[0])
+        for position, data in entries:
+            self._add_id(kind, data[id_field], position)
+        return [data for _, data in entries]
+
+    def load_history(self):
+        # History row dicts, oldest month first; Library indexes them as
+        # they come
+        months = sorted(key.split("/")[1] for key in self.files if key.startswith("history/"))
+        row = 0
+        for month in months:
+            rows = self._read(self.files[f"history/{month}"])
+            self._month_rows[month] = list(range(row, row + len(rows)))
+            row += len(rows)
+            yield from rows
+        self._history_rows = row
+
+    def _read(self, name):
+        with open(os.path.join(self.path, name), "r") as f:
+            return json.load(f)
+
+    # --------------------------------------------
+    # Dirty tracking
+    # --------------------------------------------
+    def record(self, op, **data):
+        with self._lock:
+            self._mark(op, data)
+
+    def record_batch(self, records):
+        with self._lock:
+            for op, data in records:
+                self._mark(op, data)
+
+    def _add_id(self, kind, key, position=None):
+        positions = self._positions[kind]
+        positions[key] = len(positions) if position is None else position
+        shard = self.shard_of(kind, key)
+        self._ids[kind].setdefault(shard, []).append(key)
+        return shard
+
+    def _mark(self, op, data):
+        if op == "add_book":
+            self.dirty.add(self._add_id("books", data["book"]["book_id"]))
+        elif op == "add_member":
+            self.dirty.add(self._add_id("members", data["member"]["member_id"]))
+        elif op in ("borrow", "return", "import_loan"):
+            # Availability and the member's open loans change; new history
+            # rows are assigned to their month on save
+            member_id, book_id = data["member_id"], data["book_id"]
+            self.dirty.add(self.shard_of("books", book_id))
+            self.dirty.add(self.shard_of("members", member_id))
+            if op == "borrow":
+                self._open_months[(member_id, book_id)] = data["on"][:7]
+            elif op == "import_loan" and data["returned_on"] is None:
+                self._open_months[(member_id, book_id)] = data["borrowed_on"][:7]
+            elif op == "return":
+                # The closed row lives in the month it was borrowed
+                month = self._open_months.pop((member_id, book_id), None)
+                if month:
+                    self.dirty.add(f"history/{month}")
+        else:
+            raise ValueError(f"Unknown storage operation: {op}")
+
+    # --------------------------------------------
+    # Saving
+    # --------------------------------------------
+    def save(self, library):
+        # Library.save() calls this with every Library lock held
+        with self._lock:
+            if not self.files and not self.dirty:
+                self._adopt(library)
+            if self._history_rows is not None:
+                history = library.borrow_history
+                for row in range(self._history_rows, len(history)):
+                    month = history[row].borrowed_on[:7]
+                    self._month_rows.setdefault(month, []).append(row)
+                    self.dirty.add(f"history/{month}")
+                self._history_rows = len(history)
+            loan_policy = library.loan_policy()
+            if not self.dirty and library.journal_seq == self.journal_seq and loan_policy == self.loan_policy:
+                return
+
+            generation = self.generation + 1
+            files = dict(self.files)
+            for key in sorted(self.dirty):
+                kind, part = key.split("/")
+                if kind == "books":
+                    positions = self._positions[kind]
+                    rows = [[positions[i], library.find_book_by_id(i).to_dict()] for i in self._ids[kind][key]]
+                elif kind == "members":
+                    positions = self._positions[kind]
+                    rows = [[positions[i], library.find_member_by_id(i).to_dict()] for i in self._ids[kind][key]]
+                else:
+                    history = library.borrow_history
+                    rows = [history[row].to_dict() for row in self._month_rows[part]]
+                name = f"{kind}-{part}.g{generation}.json"
+                atomic_write(os.path.join(self.path, name), json.dumps(rows, separators=(",", ":")))
+                files[key] = name
+
+            manifest = {"format": 1, "shards": self.shards, "generation": generation,
+                        "journal_seq": library.journal_seq, "loan_policy": loan_policy, "files": files}
+            atomic_write(os.path.join(self.path, MANIFEST), json.dumps(manifest, indent=1))
+            for key, name in self.files.items():
+                if files[key] != name:
+                    os.remove(os.path.join(self.path, name))
+            self.files = files
+            self.generation = generation
+            self.journal_seq = library.journal_seq
+            self.loan_policy = loan_policy
+            self.dirty = set()
+
+    def _adopt(self, library):
+        # First save into an empty directory: every shard is new
+        for book in library.books:
+            self.dirty.add(self._add_id("books", book.book_id))
+        for member in library.members:
+            self.dirty.add(self._add_id("members", member.member_id))
+            for loan in member.borrowed_books:
+                self._open_months[(member.member_id, loan["book_id"])] = loan["borrowed_on"][:7]
+        self._history_rows = 0
+
+
+MANIFEST = "manifest.json"
+
+
+# --------------------------------------------
+# Migration: library_data.json -> SQLite / sharded directory
+# --------------------------------------------
+def migrate_json_to_sqlite(json_path="library_data.json", db_path="library.db"):
+    return _migrate(json_path, SqliteStorage(db_path))
+
+def migrate_json_to_shards(json_path="library_data.json", directory="library_data", shards=16):
+    return _migrate(json_path, ShardedStorage(directory, shards))
+
+def _migrate(json_path, storage):
+    from libraryClasses import Library
+
+    library = Library.from_dict(JsonStorage(json_path).load(), json_path)
+    try:
+        storage.save(library)
+    finally:
+        storage.close()
+    return len(library.books), len(library.members), len(library.borrow_history)
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = [a for a in sys.argv[1:] if a != "--sharded"]
+    if len(args) != 2:
+        print("Usage: python storage.py <library_data.json> <library.db>")
+        print("       python storage.py --sharded <library_data.json> <directory>")
+        sys.exit(1)
+    migrate = migrate_json_to_shards if "--sharded" in sys.argv else migrate_json_to_sqlite
+    books, members, history = migrate(args[0], args[1])
+    print(f"Migrated {books} books, {members} members and {history} borrow records to {args[1]}")
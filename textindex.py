@@ -0,0 +1,169 @@
+# textindex.py
+
+import heapq
+import re
+
+TOKEN_RE = re.compile(r"\w+")
+NGRAM = 3
+VERIFY_BELOW = 256  # candidate count below which substring checks beat more postings
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+def ngrams(token, n=NGRAM):
+    return {token[i:i + n] for i in range(len(token) - n + 1)}
+
+
+#####################
+## Define TextIndex class
+##### In-memory inverted index over the text fields of a list of documents.
+##### Documents are identified by their position (doc id) and only appended.
+##### - postings: per field, token -> set of doc ids
+##### - grams:    trigram -> set of vocabulary tokens containing it, so a
+#####             substring/prefix term expands to matching tokens without
+#####             touching the documents themselves
+##### - texts:    per field, the lowercased text of every document, used to
+#####             confirm candidates for exact substring (compatibility) search
+class TextIndex:
+    def __init__(self, weights=None):
+        # Relevance weight of a match in each field
+        self.weights = weights or {"title": 2, "author": 1}
+        self._texts = {field: [] for field in self.weights}
+        self._postings = {field: {} for field in self.weights}
+        self._grams = {}
+        self._vocab = set()
+
+    def __len__(self):
+        return len(next(iter(self._texts.values())))
+
+    def add(self, doc_id, **fields):
+        if doc_id != len(self):
+            raise ValueError("Documents must be added in doc id order.")
+        for field, postings in self._postings.items():
+            text = fields[field].lower()
+            self._texts[field].append(text)
+            for token in TOKEN_RE.findall(text):
+                docs = postings.get(token)
+                if docs is None:
+                    postings[token] = docs = set()
+                    self._add_to_vocab(token)
+                docs.add(doc_id)
+
+    def _add_to_vocab(self, token):
+        if token in self._vocab:
+            return
+        self._vocab.add(token)
+        for gram in ngrams(token):
+            tokens = self._grams.get(gram)
+            if tokens is None:
+                self._grams[gram] = tokens = set()
+            tokens.add(token)
+
+    def expand(self, term):
+        """Vocabulary tokens that contain term."""
+        if len(term) < NGRAM:
+            return [t for t in self._vocab if term in t]
+        gram_sets = [self._grams.get(g) for g in ngrams(term)]
+        if not all(gram_sets):
+            return []
+        gram_sets.sort(key=len)
+        candidates = gram_sets[0].intersection(*gram_sets[1:])
+        return [t for t in candidates if term in t]
+
+    # --------------------------------------------
+    # Substring search (original search_books semantics)
+    # --------------------------------------------
+    def substring_matches(self, field, query, within=None):
+        """Doc ids, in order, whose field contains query case-insensitively.
+
+        Every word in the query must sit inside a word of a matching document,
+        so the postings of the expanded query words give a candidate set that
+        is then confirmed with a plain substring test. within optionally
+        restricts the result to an earlier match list.
+        """
+        query = query.lower()
+        texts = self._texts[field]
+        if within is not None:
+            return [i for i in within if query in texts[i]]
+        candidates = self._candidates(field, query)
+        if candidates is None:
+            return [i for i, text in enumerate(texts) if query in text]
+        return sorted(i for i in candidates if query in texts[i])
+
+    def iter_substring_matches(self, queries, after=-1):
+        """Iterator over doc ids greater than after, in order, whose fields
+        all contain their query ({field: query}, empty queries ignored).
+
+        Candidates are gathered up front; the substring confirmation runs as
+        the iterator is consumed, so a caller that stops after one page does
+        no further work. Queries whose words are all shorter than NGRAM
+        match most documents, so those are confirmed by a plain scan rather
+        than by expanding the whole vocabulary. Documents added later are
+        not included.
+        """
+        queries = {field: query.lower() for field, query in queries.items() if query}
+        candidates = None
+        for field, query in queries.items():
+            docs = self._candidates(field, query, short_terms=False)
+            if docs is not None:
+                candidates = docs if candidates is None else candidates & docs
+        if candidates is None:
+            docs = range(after + 1, len(self))
+        else:
+            docs = sorted(filter(after.__lt__, candidates))
+        checks = [(self._texts[field], query) for field, query in queries.items()]
+        return (i for i in docs if all(query in texts[i] for texts, query in checks))
+
+    def _candidates(self, field, query, short_terms=True):
+        # Superset of the doc ids whose field contains query (lowercased),
+        # from the postings of its words; None when it has no words (or,
+        # without short_terms, no word of NGRAM characters)
+        terms = set(TOKEN_RE.findall(query))
+        if not terms or (not short_terms and max(map(len, terms)) < NGRAM):
+            return None
+        postings = self._postings[field]
+        candidates = None
+        for term in sorted(terms, key=len, reverse=True):  # longest is usually most selective
+            if candidates is not None and (len(term) < NGRAM or len(candidates) <= VERIFY_BELOW):
+                break  # cheaper to confirm the remaining candidates directly
+            docs = set()
+            for token in self.expand(term):
+                docs |= postings.get(token, set())
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                return set()
+        return candidates
+
+    # --------------------------------------------
+    # Ranked multi-term search
+    # --------------------------------------------
+    def search(self, query, limit=None):
+        """Doc ids matching every term of query, best first.
+
+        A term scores 3 for an exact word match, 2 for a word prefix and 1 for
+        any other substring, times the weight of the field it matched in.
+        Ties keep doc id order.
+        """
+        scores = None
+        for term in set(tokenize(query)):
+            term_scores = {}
+            for token in self.expand(term):
+                quality = 3 if token == term else 2 if token.startswith(term) else 1
+                for field, weight in self.weights.items():
+                    score = quality * weight
+                    for doc in self._postings[field].get(token, ()):
+                        if score > term_scores.get(doc, 0):
+                            term_scores[doc] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc: scores[doc] + score for doc, score in term_scores.items() if doc in scores}
+            if not scores:
+                return []
+
+        if not scores:
+            return []
+        key = lambda doc: (-scores[doc], doc)
+        if limit is not None:
+            return heapq.nsmallest(limit, scores, key=key)
+        return sorted(scores, key=key)
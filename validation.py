@@ -1,52 +1,96 @@
 # validation.py
 
 import re
+from collections import namedtuple
+from collections.abc import Mapping
+from itertools import compress, repeat
 
 class ValidationError(Exception):
     """Custom exception for all validation-related issues."""
     pass
 
-def validate_book_id(book_id):
-    # Example rule: BOOK IDs like B101, B202, BK001 etc.
-    pattern = r'^[A-Za-z]{1,3}\d{2,5}$'
-    if not re.match(pattern, book_id):
-        raise ValidationError("Invalid Book ID. Use letters followed by digits (e.g., B101, BK202).")
+## Patterns, compiled once at import
+BOOK_ID_PATTERN = re.compile(r'^[A-Za-z]{1,3}\d{2,5}$')     # B101, BK202
+MEMBER_ID_PATTERN = re.compile(r'^[A-Za-z]{1,4}\d{2,5}$')   # M001, MEM32
+NAME_PATTERN = re.compile(r"^[A-Za-z\s.]+$")
+CONTACT_PATTERN = re.compile(r'^[6-9]\d{9}$')               # Indian mobile numbers
 
-def validate_member_id(member_id):
-    # Example rule: Member IDs like M001, MEM32 etc.
-    pattern = r'^[A-Za-z]{1,4}\d{2,5}$'
-    if not re.match(pattern, member_id):
-        raise ValidationError("Invalid Member ID format. Use letters followed by digits (e.g., M001).")
+## Field checks: take a value, return an error message or None
+def check_book_id(book_id):
+    if not BOOK_ID_PATTERN.match(book_id):
+        return "Invalid Book ID. Use letters followed by digits (e.g., B101, BK202)."
 
-def validate_name(name):
+def check_member_id(member_id):
+    if not MEMBER_ID_PATTERN.match(member_id):
+        return "Invalid Member ID format. Use letters followed by digits (e.g., M001)."
+
+def check_name(name):
     if not name.strip():
-        raise ValidationError("Name cannot be empty.")
-    if not re.match(r"^[A-Za-z\s.]+$", name):
-        raise ValidationError("Name should contain only alphabets and spaces.")
+        return "Name cannot be empty."
+    if not NAME_PATTERN.match(name):
+        return "Name should contain only alphabets and spaces."
 
-def validate_age(age):
+def check_age(age):
+    if isinstance(age, str):
+        # Imported rows carry the age as text
+        age = age.strip()
+        if not age.isdigit():
+            return "Age must be a whole number."
+        age = int(age)
     if not (1 <= age <= 120):
-        raise ValidationError("Age must be between 1 and 120.")
+        return "Age must be between 1 and 120."
 
-def validate_contact(contact):
-    # Very simple Indian mobile number validator
-    pattern = r'^[6-9]\d{9}$'
-    if not re.match(pattern, contact):
-        raise ValidationError("Invalid contact number. Use 10-digit Indian mobile numbers starting with 6-9.")
+def check_contact(contact):
+    if isinstance(contact, int) and not isinstance(contact, bool):
+        # JSON rows may carry the number unquoted
+        contact = str(contact)
+    if not CONTACT_PATTERN.match(contact):
+        return "Invalid contact number. Use 10-digit Indian mobile numbers starting with 6-9."
 
-def validate_genre(genre):
+def check_genre(genre):
     if not genre.strip():
-        raise ValidationError("Genre cannot be empty.")
+        return "Genre cannot be empty."
 
-def validate_author(author):
+def check_author(author):
     if not author.strip():
-        raise ValidationError("Author cannot be empty.")
+        return "Author cannot be empty."
 
-def validate_title(title):
+def check_title(title):
     if not title.strip():
-        raise ValidationError("Title cannot be empty.")
+        return "Title cannot be empty."
+
+## Raising validators, one per field
+def _raise_on(check):
+    def validator(value):
+        message = check(value)
+        if message:
+            raise ValidationError(message)
+    validator.__name__ = check.__name__.replace("check_", "validate_")
+    return validator
+
+validate_book_id = _raise_on(check_book_id)
+validate_member_id = _raise_on(check_member_id)
+validate_name = _raise_on(check_name)
+validate_age = _raise_on(check_age)
+validate_contact = _raise_on(check_contact)
+validate_genre = _raise_on(check_genre)
+validate_author = _raise_on(check_author)
+validate_title = _raise_on(check_title)
 
-## Map of to-be-validated elements and their validators with messages
+## Map of to-be-validated elements, their prompts and checks
+## format: "element" : (prompt, check)
+RULES = {
+    "book_id": ("Book ID :", check_book_id),
+    "member_id": ("Member ID :", check_member_id),
+    "name": ("Name :", check_name),
+    "age": ("Age :", check_age),
+    "contact": ("Contact :", check_contact),
+    "genre": ("Genre :", check_genre),
+    "author": ("Author :", check_author),
+    "title": ("Title :", check_title)
+}
+
+## Same map with the raising validators, as used before RULES existed
 ## format: "element" : (prompt, validator)
 elementValidatorMap = {
     "book_id": ("Book ID :", validate_book_id),
@@ -59,18 +103,141 @@ elementValidatorMap = {
     "title": ("Title :", validate_title)
 }
 
+## Fields every imported record must pass
+BOOK_FIELDS = ("book_id", "title", "author", "genre")
+MEMBER_FIELDS = ("member_id", "name", "age", "contact")
+
+def check_field(field, value):
+    # Error message for one value of a field, or None if it is valid
+    _, check = RULES[field]
+    try:
+        return check(value)
+    except (TypeError, AttributeError):
+        return f"Invalid {field}."
+
+
+#####################
+## Define RecordValidator class
+##### Validates whole records (dicts) against a fixed list of fields and
+##### returns structured FieldError lists instead of stopping at the first
+##### problem. validate_many() checks batches of at least COLUMNAR_BATCH
+##### dicts one column at a time: each distinct value is checked once
+##### (genres, authors and ages repeat heavily in real imports) and valid
+##### strings are cleared by the compiled pattern without a Python call.
+FieldError = namedtuple("FieldError", ["field", "message"])
+
+## Predicates that accept a valid string for a field in one C call (a
+## false result only means "run the full check")
+FAST_ACCEPT = {
+    "book_id": BOOK_ID_PATTERN.match,
+    "member_id": MEMBER_ID_PATTERN.match,
+    "contact": CONTACT_PATTERN.match,
+    "genre": str.strip,
+    "author": str.strip,
+    "title": str.strip,
+}
+
+class RecordValidator:
+    COLUMNAR_BATCH = 64
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        for field in self.fields:
+            if field not in RULES:
+                raise ValueError(f"Missing configuration for {field=}")
+
+    def validate(self, record):
+        errors = []
+        for field in self.fields:
+            message = self._check(field, record.get(field))
+            if message:
+                errors.append(FieldError(field, message))
+        return errors
+
+    def validate_many(self, records):
+        # {index: [FieldError, ...]} for the invalid records only
+        records = records if isinstance(records, list) else list(records)
+        if len(records) < self.COLUMNAR_BATCH or not all(type(r) is dict for r in records):
+            invalid = {}
+            for i, record in enumerate(records):
+                errors = self.validate(record)
+                if errors:
+                    invalid[i] = errors
+            return invalid
+
+        invalid = {}
+        for field in self.fields:
+            column = list(map(dict.get, records, repeat(field)))
+            try:
+                distinct = set(column)
+            except TypeError:
+                # Unhashable values: check row by row
+                for i, value in enumerate(column):
+                    message = self._check(field, value)
+                    if message:
+                        invalid.setdefault(i, []).append(FieldError(field, message))
+                continue
+            fast = FAST_ACCEPT.get(field)
+            if fast is not None:
+                # Let the compiled pattern / str method clear valid strings
+                # in one C-level pass; only the rest get the full check
+                distinct -= set(filter(fast, [v for v in distinct if type(v) is str]))
+            bad = {}
+            for value in distinct:
+                message = self._check(field, value)
+                if message:
+                    bad[value] = message
+            if bad:
+                for i in compress(range(len(column)), map(bad.__contains__, column)):
+                    invalid.setdefault(i, []).append(FieldError(field, bad[column[i]]))
+        return dict(sorted(invalid.items()))
+
+    def iter_validate(self, rows, chunk_size=1024):
+        # Stream (row, errors) pairs for an iterable of rows, validating the
+        # mapping rows chunk by chunk; any other row (objects, exceptions
+        # from a reader) passes through with no errors
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield from self._validate_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._validate_chunk(chunk)
+
+    def _validate_chunk(self, chunk):
+        positions = [i for i, row in enumerate(chunk) if isinstance(row, Mapping)]
+        invalid = self.validate_many([chunk[i] for i in positions])
+        errors = {positions[k]: e for k, e in invalid.items()}
+        for i, row in enumerate(chunk):
+            yield row, errors.get(i, [])
+
+    def _check(self, field, value):
+        if value is None or value == "":
+            return f"{field} is required."
+        return check_field(field, value)
+
+BOOK_VALIDATOR = RecordValidator(BOOK_FIELDS)
+MEMBER_VALIDATOR = RecordValidator(MEMBER_FIELDS)
+
+# Validate the given fields of a record (dict); returns a list of error
+# messages instead of stopping at the first one
+def validate_fields(record, fields):
+    return [e.message for e in RecordValidator(fields).validate(record)]
+
 # Helper function that simplifies user interaction and validation
 def get_valid_input(element, isInteger=False):
-    if elementValidatorMap.get(element):
-        prompt, validator = elementValidatorMap.get(element)
-        while True:
-            value = input(prompt).strip() if not isInteger else int(input(prompt).strip())
-            try:
-                if validator:
-                    #validator(value, *args) if args else validator(value) ## enable when arg is needed for validator
-                    validator(value)
-                return value
-            except ValidationError as e:
-                print(f"Invalid input: {e}")
-    else:
-        raise ValueError(f"Missing configuration for {element=}")
\ No newline at end of file
+    if element not in RULES:
+        raise ValueError(f"Missing configuration for {element=}")
+    prompt, _ = RULES[element]
+    while True:
+        value = input(prompt).strip()
+        if isInteger:
+            if not value.lstrip("-").isdigit():
+                print("Invalid input: Enter a whole number.")
+                continue
+            value = int(value)
+        message = check_field(element, value)
+        if not message:
+            return value
+        print(f"Invalid input: {message}")